@@ -1,8 +1,15 @@
 # examples/echo_bot.py
+from __future__ import annotations
+
 import logging
 import os
+import sys
 import asyncio
+import contextlib
+import functools
+from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional
 from dotenv import load_dotenv
 
 # --- Logging and Environment Setup ---
@@ -11,105 +18,296 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-script_dir = Path(__file__).parent
-dotenv_path = script_dir / '.env'
-if dotenv_path.is_file():
-    load_dotenv(dotenv_path=dotenv_path)
-    logger.info(f"Loaded environment variables from: {dotenv_path}")
-else:
-    logger.warning(f".env file not found at: {dotenv_path}")
 
-# --- Imports ---
-try:
-    from fastapi import FastAPI
-except ImportError:
-    logger.error("FastAPI not found. Install with: pip install 'python-whatsapp-cloudbot[fastapi]'")
-    exit(1)
+# Use uvloop as the event loop when available so in-process runs get it too,
+# not only servers started with `--loop uvloop`. It is POSIX-only.
+if sys.platform != "win32":
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        logger.info("uvloop installed as the asyncio event loop policy.")
+    except ImportError:
+        logger.info("uvloop not available, using the default asyncio event loop.")
 
+# Only look for a .env file when the environment isn't already configured
+# (e.g. in containers), which saves the stat and parse on every worker start.
+if not os.environ.get("WHATSAPP_TOKEN"):
+    dotenv_path = Path(__file__).with_name('.env')
+    if dotenv_path.is_file():
+        load_dotenv(dotenv_path=dotenv_path)
+        logger.info(f"Loaded environment variables from: {dotenv_path}")
+    else:
+        logger.warning(f".env file not found at: {dotenv_path}")
+
+# --- Imports ---
 try:
     from wa_cloud import (
         Application, Bot, Message, MessageHandler, filters, WhatsAppError, APIError,
         MessageType # Import Enums used
     )
-    from wa_cloud.webhooks import setup_fastapi_webhook
+    from wa_cloud.constants import MAX_TEXT_BODY_LENGTH
 except ImportError as e:
-     logger.error(f"Failed to import wa_cloud components. Install with `pip install -e .` or `pip install python-whatsapp-cloudbot`: {e}")
-     exit(1)
+    raise SystemExit(f"Failed to import wa_cloud components. Install with `pip install -e .` or `pip install python-whatsapp-cloudbot`: {e}") from e
+
+if TYPE_CHECKING:
+    from fastapi import FastAPI
+
+def _require_deps():
+    """Imports the web server dependencies, needed only when the app is built."""
+    try:
+        from fastapi import FastAPI
+        from wa_cloud.webhooks import setup_fastapi_webhook
+    except ImportError as e:
+        raise SystemExit(f"FastAPI not found. Install with: pip install 'python-whatsapp-cloudbot[fastapi]' ({e})") from e
+    return FastAPI, setup_fastapi_webhook
+
+# Handler filters, built once and shared by every dispatch
+_START_FILTER = filters.Command("start")
+# Use ~filters.ANY_COMMAND to exclude commands from the echo handler
+_ECHO_FILTER = filters.TEXT & ~filters.ANY_COMMAND
 
 # --- Configuration ---
-WHATSAPP_TOKEN = os.getenv("WHATSAPP_TOKEN")
-PHONE_NUMBER_ID = os.getenv("PHONE_NUMBER_ID")
-VERIFY_TOKEN = os.getenv("VERIFY_TOKEN")
-WEBHOOK_PATH = "/webhook"
+@dataclass(frozen=True)
+class Settings:
+    """Bot configuration, read from the environment once at startup."""
+    whatsapp_token: str
+    phone_number_id: str
+    verify_token: str
+    webhook_path: str = "/webhook"
+    webhook_workers: int = 32
+    graph_concurrency: int = 64
+    typing_delay: float = 0.0
 
-if not all([WHATSAPP_TOKEN, PHONE_NUMBER_ID, VERIFY_TOKEN]):
-    logger.critical("Missing required environment variables. Check .env file.")
-    exit(1)
+@functools.lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Builds the Settings from the environment, exiting if required variables are missing."""
+    whatsapp_token = os.getenv("WHATSAPP_TOKEN")
+    phone_number_id = os.getenv("PHONE_NUMBER_ID")
+    verify_token = os.getenv("VERIFY_TOKEN")
+    if not all([whatsapp_token, phone_number_id, verify_token]):
+        logger.critical("Missing required environment variables. Check .env file.")
+        raise SystemExit(1)
+    return Settings(
+        whatsapp_token=whatsapp_token,
+        phone_number_id=phone_number_id,
+        verify_token=verify_token,
+        webhook_workers=int(os.getenv("WA_WORKERS", "32")),
+        graph_concurrency=int(os.getenv("GRAPH_CONCURRENCY", "64")),
+        typing_delay=float(os.getenv("ECHO_TYPING_DELAY", "0")),
+    )
 
 # --- Bot Logic ---
-async def echo_handler(message: Message, bot: Bot):
-    """Handles incoming text messages (excluding commands) and echoes them."""
-    if message.text: # Ensure text object exists
-        sender_id = message.chat_id
-        received_text = message.text.body
-        logger.info(f"Received text from {sender_id}: '{received_text}'")
+# Bound once so hot-path log calls skip the attribute lookup on `logger`
+_log_info = logger.info
+_log_error = logger.error
+
+# Echoes to the same chat that arrive within this window are sent as one reply.
+# There is no artificial processing delay; set ECHO_TYPING_DELAY (seconds, e.g.
+# 0.15) to keep the typing indicator visible a little longer before replying.
+ECHO_DEBOUNCE_SECONDS = 0.05
+_ECHO_PREFIX = "Echo: "
+
+# Pending echo bodies per chat and the flush task that will send them.
+_pending_echoes: Dict[str, List[str]] = {}
+_flush_tasks: Dict[str, asyncio.Task] = {}
+
+def with_wa_errors(fn):
+    """Wraps a handler callback with the shared wa_cloud error logging."""
+    @functools.wraps(fn)
+    async def wrapper(message: Message, bot: Bot):
         try:
-            # Mark as read and show typing (optional, good UX)
-            await bot.mark_as_read(message.id, show_typing=True)
-            # Add a small delay to simulate processing
-            await asyncio.sleep(1)
-            # Send the echo reply
-            await bot.send_text(to=sender_id, text=f"Echo: {received_text}")
-            logger.info(f"Echo sent to {sender_id}")
+            return await fn(message, bot)
         except APIError as e:
-            logger.error(f"API Error sending echo to {sender_id}: {e}")
+            _log_error("API Error in %s for %s: %s", fn.__name__, message.chat_id, e)
         except WhatsAppError as e:
-            logger.error(f"Library Error sending echo to {sender_id}: {e}")
+            _log_error("Library Error in %s for %s: %s", fn.__name__, message.chat_id, e)
         except Exception as e:
-             logger.exception(f"Unexpected error in echo_handler for {sender_id}")
+            # Type and message only; the full traceback is formatted at DEBUG level
+            _log_error("Unexpected %s in %s for %s: %s", type(e).__name__, fn.__name__, message.chat_id, e)
+            logger.debug("Traceback", exc_info=True)
+    return wrapper
+
+# Caps in-flight Graph API calls so bursts don't trigger rate limiting (429s).
+# Created on first use so it binds to the running event loop.
+_graph_semaphore: Optional[asyncio.Semaphore] = None
+
+def _graph_sem() -> asyncio.Semaphore:
+    """Returns the shared Graph API semaphore, creating it on first use."""
+    global _graph_semaphore
+    if _graph_semaphore is None:
+        _graph_semaphore = asyncio.Semaphore(get_settings().graph_concurrency)
+    return _graph_semaphore
+
+async def _mark_as_read(bot: Bot, message_id: str):
+    """Marks a message as read with typing indicator, within the Graph API limit."""
+    async with _graph_sem():
+        return await bot.mark_as_read(message_id, show_typing=True)
+
+def _echo_texts(bodies: List[str]) -> List[str]:
+    """
+    Joins buffered bodies into as few echo texts as fit WhatsApp's text limit.
+
+    A single body that is too long on its own is still sent alone (and truncated
+    by `Bot.send_text`), so it never takes the rest of the batch down with it.
+    """
+    texts: List[str] = []
+    current: List[str] = []
+    length = len(_ECHO_PREFIX)
+    for body in bodies:
+        # +1 for the newline joining this body to the previous one
+        added = len(body) + (1 if current else 0)
+        if current and length + added > MAX_TEXT_BODY_LENGTH:
+            texts.append(_ECHO_PREFIX + "\n".join(current))
+            current, length, added = [], len(_ECHO_PREFIX), len(body)
+        current.append(body)
+        length += added
+    if current:
+        texts.append(_ECHO_PREFIX + "\n".join(current))
+    return texts
+
+async def _flush_after(bot: Bot, sender_id: str, delay: float):
+    """Waits for the debounce window, then sends the buffered echoes for a chat in as few messages as fit."""
+    await asyncio.sleep(delay)
+    # Pop the buffer and the task entry together so new messages start a fresh batch
+    bodies = _pending_echoes.pop(sender_id, [])
+    _flush_tasks.pop(sender_id, None)
+    if not bodies:
+        return
+    try:
+        async with _graph_sem():
+            for text in _echo_texts(bodies):
+                await bot.send_text(to=sender_id, text=text)
+        _log_info("Echo sent to %s (%d message(s))", sender_id, len(bodies))
+    except APIError as e:
+        _log_error("API Error sending echo to %s: %s", sender_id, e)
+    except WhatsAppError as e:
+        _log_error("Library Error sending echo to %s: %s", sender_id, e)
+    except Exception as e:
+        # Type and message only; the full traceback is formatted at DEBUG level
+        _log_error("Unexpected %s flushing echoes for %s: %s", type(e).__name__, sender_id, e)
+        logger.debug("Traceback", exc_info=True)
+
+async def echo_handler(message: Message, bot: Bot):
+    """Handles incoming text messages (excluding commands) and echoes them."""
+    if not message.text: # Ensure text object exists
+        return
+    # Read the message fields once; the rest of the handler uses these locals
+    text = message.text.body
+    chat_id = message.chat_id
+    # Nothing to echo: skip both Graph API calls for empty or whitespace-only text
+    if not text or text.isspace():
+        logger.debug("Skipping empty text from %s", chat_id)
+        return
+    mid = message.id
+    # Mark as read and show typing (optional, good UX). Started first so the
+    # read receipt is in flight while the echo is buffered and sent.
+    read_task = asyncio.create_task(_mark_as_read(bot, mid))
+    _log_info("Received text from %s: %r", chat_id, text)
+    # Buffer the echo; a single flush task per chat sends the whole batch
+    _pending_echoes.setdefault(chat_id, []).append(text)
+    flush_task = _flush_tasks.get(chat_id)
+    if flush_task is None:
+        flush_task = _flush_tasks[chat_id] = asyncio.create_task(
+            _flush_after(bot, chat_id, max(ECHO_DEBOUNCE_SECONDS, get_settings().typing_delay))
+        )
+    # Wait until this message's batch is sent, so the echo stays part of this
+    # handler's task and Application.shutdown drains it instead of dropping it.
+    # Shielded: one handler being cancelled must not cancel a batch shared with others.
+    await asyncio.shield(flush_task)
+    # A failed read receipt must not affect the echo, which is sent independently;
+    # errors are logged by with_wa_errors.
+    # Shielded so cancelling this handler doesn't cancel read_task on the way out,
+    # which keeps the two cases below distinguishable.
+    try:
+        await asyncio.shield(read_task)
+    except asyncio.CancelledError:
+        # Only swallow cancellation of the read receipt itself; if this handler
+        # task is being cancelled (e.g. by Application.shutdown), let it propagate.
+        if not read_task.cancelled():
+            raise
 
 async def start_command_handler(message: Message, bot: Bot):
      """Handles the /start command."""
-     logger.info(f"Received /start command from {message.chat_id}")
-     await bot.send_text(message.chat_id, "Hello! I'm an echo bot using wa_cloud.")
+     _log_info("Received /start command from %s", message.chat_id)
+     async with _graph_sem():
+         await bot.send_text(message.chat_id, "Hello! I'm an echo bot using wa_cloud.")
 
 # --- Application Setup ---
 def setup_app() -> FastAPI:
     """Configures and returns the FastAPI application."""
     logger.info("Setting up wa_cloud application...")
-    bot = Bot(token=WHATSAPP_TOKEN, phone_number_id=PHONE_NUMBER_ID)
+    FastAPI, setup_fastapi_webhook = _require_deps()
+    settings = get_settings()
+    # One pooled HTTP/2 client, sized so every webhook worker can keep a connection
+    bot = Bot(
+        token=settings.whatsapp_token,
+        phone_number_id=settings.phone_number_id,
+        http2=True,
+        max_connections=settings.webhook_workers * 2,
+        max_keepalive_connections=settings.webhook_workers * 2,
+    )
     application = Application(bot=bot)
 
     # Register handlers
-    application.add_handler(MessageHandler(filters.Command("start"), start_command_handler))
-    # Use ~filters.ANY_COMMAND to exclude commands from the echo handler
-    application.add_handler(MessageHandler(filters.TEXT & ~filters.ANY_COMMAND, echo_handler))
+    application.add_handler(MessageHandler(_START_FILTER, with_wa_errors(start_command_handler)))
+    application.add_handler(MessageHandler(_ECHO_FILTER, with_wa_errors(echo_handler)))
 
     logger.info("Handlers registered.")
 
+    @contextlib.asynccontextmanager
+    async def lifespan(app: FastAPI):
+        """Runs once per worker; setup_fastapi_webhook runs the Application lifecycle inside it."""
+        # Open the connection to graph.facebook.com before the first message arrives
+        await bot.prewarm()
+        yield
+
     # Create FastAPI app and setup webhook routes
-    fastapi_app = FastAPI(title="wa_cloud Echo Bot")
+    fastapi_app = FastAPI(title="wa_cloud Echo Bot", lifespan=lifespan)
     setup_fastapi_webhook(
         app=fastapi_app,
         application=application,
-        webhook_path=WEBHOOK_PATH,
-        verify_token=VERIFY_TOKEN,
-        run_background_tasks=True # Recommended
+        webhook_path=settings.webhook_path,
+        verify_token=settings.verify_token,
+        run_background_tasks=True, # Recommended
+        num_workers=settings.webhook_workers # Bounded worker pool for webhook bursts
     )
+
     logger.info("FastAPI webhook configured.")
     return fastapi_app
 
 # --- Run the App ---
-app = setup_app() # Initialize the app when the script loads
+# `app` is built on first access (PEP 562): uvicorn's "echo_bot:app" lookup in each
+# worker triggers it, while the script's supervisor process and tools that only
+# import this module never build a Bot or read the settings.
+def __getattr__(name: str):
+    if name == "app":
+        built = globals()["app"] = setup_app() # Cache so later lookups skip __getattr__
+        return built
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Allow running with `python echo_bot.py`
+# Set ENV=prod for a multi-worker server on uvloop/httptools (no auto-reload).
 if __name__ == "__main__":
      import uvicorn
-     logger.info("Starting Uvicorn server for development...")
      port = int(os.getenv("PORT", 5000))
-     uvicorn.run(
-         "echo_bot:app", # Point to the app object in this file
-         host="0.0.0.0", # Listen on all interfaces
-         port=port,
-         reload=True   # Enable auto-reload for development
-      )
\ No newline at end of file
+     if os.getenv("ENV", "dev") == "prod":
+         # Same default as gunicorn's WEB_CONCURRENCY guidance: 2 * cores + 1
+         workers = int(os.getenv("WEB_CONCURRENCY", (os.cpu_count() or 1) * 2 + 1))
+         logger.info("Starting Uvicorn server with %d worker(s)...", workers)
+         uvicorn.run(
+             "echo_bot:app",
+             host="0.0.0.0",
+             port=port,
+             loop="uvloop" if sys.platform != "win32" else "asyncio", # uvloop is POSIX-only
+             http="httptools",
+             workers=workers,
+             reload=False
+         )
+     else:
+         logger.info("Starting Uvicorn server for development...")
+         uvicorn.run(
+             "echo_bot:app", # Point to the app object in this file
+             host="0.0.0.0", # Listen on all interfaces
+             port=port,
+             reload=True   # Enable auto-reload for development
+          )
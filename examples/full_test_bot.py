@@ -5,14 +5,24 @@ Example Bot using the wa_cloud library with FastAPI.
 This script demonstrates how to set up the Application, Bot, handlers,
 and use various sending methods provided by the library. It includes
 commands to test different message types and media operations.
+
+The handlers spend nearly all of their time awaiting Graph API calls, so
+compiling this module (e.g. ``python -m nuitka --module full_test_bot.py``)
+is optional. If you try it, benchmark a round of ``await bot.send_text(...)``
+against the pure-Python module under your uvicorn version first, since
+compiled coroutines are not always faster.
 """
 
 import asyncio
+import contextlib
+import functools
 import logging
 import mimetypes
 import os
+import sys
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 
 # Third-party imports
 from dotenv import load_dotenv
@@ -27,6 +37,16 @@ logging.basicConfig(
 # logging.getLogger("wa_cloud").setLevel(logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Run on uvloop when available: every handler awaits HTTPS calls to the Graph API,
+# and uvloop's libuv-based loop lowers per-await and socket overhead. POSIX-only.
+if sys.platform != "win32":
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        logger.info("uvloop installed as the asyncio event loop policy.")
+    except ImportError:
+        logger.info("uvloop not available, using the default asyncio event loop.")
+
 # Load environment variables from .env file located in the same directory
 script_dir = Path(__file__).parent
 dotenv_path = script_dir / '.env'
@@ -57,6 +77,8 @@ try:
         TemplateSend, TemplateLanguage, TemplateComponent, TemplateButtonComponent,
         TemplateParameter, TemplateCurrency, TemplateDateTime, TemplateLocationSend
     )
+    from wa_cloud.ext.filters import BaseFilter # For typing the routing table
+    from wa_cloud.http_client import create_async_client # Pooled client shared with the Bot
     # Import the webhook helper
     from wa_cloud.webhooks import setup_fastapi_webhook
 except ImportError as e:
@@ -64,32 +86,209 @@ except ImportError as e:
      exit(1)
 
 # --- Load Configuration from Environment ---
-WHATSAPP_TOKEN = os.getenv("WHATSAPP_TOKEN")
-PHONE_NUMBER_ID = os.getenv("PHONE_NUMBER_ID")
-VERIFY_TOKEN = os.getenv("VERIFY_TOKEN")
-WEBHOOK_PATH = "/webhook" # URL path for the webhook endpoint
-
-# Validate essential configuration
-logger.info(f"WHATSAPP_TOKEN loaded: {'Yes' if WHATSAPP_TOKEN else 'No'}")
-logger.info(f"PHONE_NUMBER_ID loaded: {'Yes' if PHONE_NUMBER_ID else 'No'}")
-logger.info(f"VERIFY_TOKEN loaded: {'Yes' if VERIFY_TOKEN else 'No'}")
-
-if not all([WHATSAPP_TOKEN, PHONE_NUMBER_ID, VERIFY_TOKEN]):
-    logger.critical("CRITICAL: Required environment variables missing (WHATSAPP_TOKEN, PHONE_NUMBER_ID, VERIFY_TOKEN). Check your .env file.")
-    exit(1)
+@dataclass(frozen=True)
+class Settings:
+    """Bot configuration, read from the environment once at startup."""
+    whatsapp_token: str
+    phone_number_id: str
+    verify_token: str
+    webhook_path: str = "/webhook" # URL path for the webhook endpoint
+    port: int = 5000
+    upload_concurrency: int = 4 # Parallel sample uploads
+    send_unsupported_ack: bool = True # Reply to unsupported message types
+
+@functools.lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Builds the Settings from the environment, exiting if required variables are missing."""
+    whatsapp_token = os.getenv("WHATSAPP_TOKEN")
+    phone_number_id = os.getenv("PHONE_NUMBER_ID")
+    verify_token = os.getenv("VERIFY_TOKEN")
+    logger.info("WHATSAPP_TOKEN loaded: %s", "Yes" if whatsapp_token else "No")
+    logger.info("PHONE_NUMBER_ID loaded: %s", "Yes" if phone_number_id else "No")
+    logger.info("VERIFY_TOKEN loaded: %s", "Yes" if verify_token else "No")
+    if not all([whatsapp_token, phone_number_id, verify_token]):
+        logger.critical("CRITICAL: Required environment variables missing (WHATSAPP_TOKEN, PHONE_NUMBER_ID, VERIFY_TOKEN). Check your .env file.")
+        raise SystemExit(1)
+    return Settings(
+        whatsapp_token=whatsapp_token,
+        phone_number_id=phone_number_id,
+        verify_token=verify_token,
+        port=int(os.getenv("PORT", "5000")),
+        upload_concurrency=max(1, int(os.getenv("UPLOAD_CONCURRENCY", "4"))),
+        send_unsupported_ack=os.getenv("SEND_UNSUPPORTED_ACK", "1") == "1",
+    )
+
+# Validate essential configuration at import time rather than on the first request
+SETTINGS = get_settings()
 
 # --- Global State / Helpers (Example Only - Use Database in Production) ---
-last_received_wamid: Optional[str] = None # Stores the WAMID of the last message received from a user
-last_media_ids: Dict[str, str] = {} # Stores uploaded media IDs { 'image_jpg': id1, 'video': id2, ...}
+class BotState:
+    """Mutable per-process bot state, kept in slots instead of module globals."""
+    __slots__ = ("last_wamids",)
+
+    def __init__(self) -> None:
+        # WAMID of the last message received, per chat, so concurrent chats don't clobber each other
+        self.last_wamids: Dict[str, str] = {}
+
+    def remember(self, message: Message) -> None:
+        """Records `message` as the last one received in its chat."""
+        self.last_wamids[message.chat_id] = message.id
+
+    def last_wamid(self, chat_id: str) -> Optional[str]:
+        """Returns the WAMID of the last message received in `chat_id`, if any."""
+        return self.last_wamids.get(chat_id)
+
+
+STATE = BotState()
+
+async def _last_wamid_or_reply(message: Message, bot: Bot) -> Optional[str]:
+    """Returns the last non-command WAMID stored for the chat, or tells the user there is none."""
+    target_id = STATE.last_wamid(message.chat_id)
+    if target_id is None:
+        await bot.send_text(message.chat_id, "No previous message to act on. Send a regular message first, then retry.")
+    return target_id
+
+
+class MediaIds:
+    """Fixed set of slots holding the uploaded sample media IDs."""
+    __slots__ = ("image_jpg", "image_png", "video", "audio", "document", "sticker")
+
+    def __init__(self) -> None:
+        for name in self.__slots__:
+            setattr(self, name, None)
+
+    def items(self):
+        """Yields (slot, media_id) pairs for the slots that are set."""
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if value is not None:
+                yield name, value
+
+    def discard(self, media_id: str) -> list:
+        """Clears every slot holding ``media_id`` and returns their names."""
+        cleared = [name for name, value in self.items() if value == media_id]
+        for name in cleared:
+            setattr(self, name, None)
+        return cleared
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+MEDIA_IDS = MediaIds() # Stores uploaded media IDs (image_jpg, video, ...)
 SAMPLE_FILES_DIR = script_dir / "sample_files" # Directory containing sample media
 DOWNLOADS_DIR = script_dir / "downloads" # Directory to save downloaded media
+SAMPLE_FILES_AVAILABLE = False # Set once by the lifespan in main()
+
+# --- Static Payloads (built once at import time) ---
+HELP_TEXT = """*wa_cloud Test Bot Commands:*
+/help - Show this message
+/text - Send a simple text message
+/format - Send text with Markdown formatting
+/image - Send sample JPG image (run /upload first)
+/video - Send sample MP4 video (run /upload first)
+/audio - Send sample MP3 audio (run /upload first)
+/document - Send sample PDF document (run /upload first)
+/sticker - Send sample WEBP sticker (run /upload first)
+/location - Send a sample static location pin
+/contact - Send a sample contact card message
+/buttons - Send a message with interactive reply buttons
+/list - Send a message with an interactive list
+/cta - Send a message with an interactive Call-To-Action URL button
+/flow - Send a sample Flow message (requires valid Flow ID in code)
+/template - Send the 'hello_world' template message
+/react - React ❤️ to the last received message
+/unreact - Remove reaction from the last received message
+/mark_read - Mark the last received message as read
+/upload - Re-upload sample media files from ./sample_files
+/download <media_id> - Download media by its ID to ./downloads
+/delete <media_id> - Delete uploaded media by its ID"""
+
+# hello_world has no variables/components
+HELLO_WORLD_TEMPLATE = TemplateSend(name="hello_world", language=TemplateLanguage(code="en_US"))
+
+SAMPLE_CONTACT = ContactSend(
+    name=ContactNameSend(formatted_name="Sam T. Test", first_name="Sam", last_name="Test"),
+    phones=[ContactPhoneSend(phone="+15550001111", type="Mobile", wa_id="15550001111")], # Include wa_id for message button
+    emails=[ContactEmailSend(email="sam.test@example.com", type="Work")]
+)
+
+SAMPLE_BUTTONS = [
+    {"id": "reply_yes", "title": "Yes"},
+    {"id": "reply_no", "title": "No"},
+    {"id": "reply_maybe", "title": "Maybe"},
+]
+
+SAMPLE_LIST_SECTIONS = [
+    {
+        "title": "Category A",
+        "rows": [
+            {"id": "a_item_1", "title": "Item A1", "description": "Description for A1"},
+            {"id": "a_item_2", "title": "Item A2"}
+        ]
+    },
+    {
+        "title": "Category B",
+        "rows": [{"id": "b_item_1", "title": "Item B1"}]
+    }
+]
+
+# Static text headers; only the image header for /buttons depends on runtime state
+_TEXT_HEADER_BUTTONS = InteractiveHeader(type="text", text="Button Demo Header")
+_TEXT_HEADER_CHOOSE = InteractiveHeader(type="text", text="Choose from List")
+_TEXT_HEADER_LEARN = InteractiveHeader(type="text", text="Learn More")
+_TEXT_HEADER_FLOW = InteractiveHeader(type="text", text="Initiate Flow")
+
+# Strong refs to fire-and-forget tasks so they aren't garbage collected mid-flight
+_background_tasks: set = set()
+
+def _fire_and_forget(coro) -> asyncio.Task:
+    """Schedules a coroutine whose result the handler doesn't need to wait for."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+async def _drain_background_tasks(timeout: float) -> None:
+    """Waits up to `timeout` seconds for fire-and-forget tasks, then cancels the rest."""
+    if not _background_tasks:
+        return
+    _, pending = await asyncio.wait(set(_background_tasks), timeout=timeout)
+    if pending:
+        logger.warning("Cancelling %d background task(s) still running at shutdown.", len(pending))
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _send_read_receipt(bot: Bot, message_id: str) -> None:
+    """
+    Marks an incoming message as read, for use with _fire_and_forget.
+
+    The handlers reply without waiting for the receipt. No typing indicator is
+    requested, since it could land after the reply. mark_as_read logs API errors
+    itself but raises ValueError for an empty id, so anything it raises is logged
+    here rather than left unretrieved on the background task.
+    """
+    try:
+        await bot.mark_as_read(message_id)
+    except Exception as e:
+        logger.error("Failed to mark message %s as read: %s", message_id, e)
+
+# Build the MIME table now rather than inside the first /download handler
+mimetypes.init()
+
+@functools.lru_cache(maxsize=64)
+def _ext_for(mime: str) -> str:
+    """Returns the file extension for a MIME type, using .bin as default fallback."""
+    return mimetypes.guess_extension(mime) or ".bin"
 
 async def upload_sample_files(bot: Bot):
     """Helper function to upload sample files on startup or via command."""
     logger.info("Attempting to upload sample files...")
-    # Ensure the sample files directory exists
-    if not SAMPLE_FILES_DIR.is_dir():
-        logger.warning(f"Sample files directory not found: {SAMPLE_FILES_DIR}. Skipping uploads.")
+    # Directory existence is checked once at startup (see lifespan in main())
+    if not SAMPLE_FILES_AVAILABLE:
+        logger.warning("Sample files directory not found: %s. Skipping uploads.", SAMPLE_FILES_DIR)
         return
 
     sample_files_map = {
@@ -103,23 +302,44 @@ async def upload_sample_files(bot: Bot):
         # "header_image": SAMPLE_FILES_DIR / "header_test.jpg",
     }
 
-    # Create an isolated task group for uploads if needed, or run sequentially
-    for key, file_path in sample_files_map.items():
-        if file_path.is_file():
+    # Bound the uploads in flight to stay within WhatsApp's rate limits
+    sem = asyncio.Semaphore(SETTINGS.upload_concurrency)
+
+    async def upload_one(key: str, file_path: Path) -> None:
+        """Uploads one file, stores its media ID and logs its own failure."""
+        async with sem:
             try:
                 # Let upload_media guess the MIME type
                 response = await bot.upload_media(file_path)
-                if response and response.id:
-                    last_media_ids[key] = response.id
-                    logger.info(f"Uploaded '{key}' ({file_path.name}) -> Media ID: {response.id}")
-                else:
-                    logger.warning(f"Upload successful for {key} but no Media ID received in response.")
             except (APIError, NetworkError, WhatsAppError, ValueError, FileNotFoundError) as e:
-                logger.error(f"Failed to upload sample file '{key}' ({file_path.name}): {e}")
-            except Exception as e:
-                 logger.exception(f"Unexpected error uploading sample file '{key}' ({file_path.name})")
+                logger.error("Failed to upload sample file '%s' (%s): %s", key, file_path.name, e)
+                return
+            except Exception:
+                logger.exception("Unexpected error uploading sample file '%s' (%s)", key, file_path.name)
+                return
+        if response and response.id:
+            setattr(MEDIA_IDS, key, response.id)
+            logger.info("Uploaded '%s' (%s) -> Media ID: %s", key, file_path.name, response.id)
+        else:
+            logger.warning("Upload successful for %s but no Media ID received in response.", key)
+
+    # Check which files exist in worker threads, keeping stat() calls off the event loop
+    loop = asyncio.get_running_loop()
+    exists = await asyncio.gather(*(loop.run_in_executor(None, p.is_file) for p in sample_files_map.values()))
+    uploads = []
+    for (key, file_path), is_file in zip(sample_files_map.items(), exists):
+        if is_file:
+            uploads.append((key, file_path))
         else:
-            logger.warning(f"Sample file not found, skipping upload: {file_path}")
+            logger.warning("Sample file not found, skipping upload: %s", file_path)
+
+    # upload_one never raises, so one failed file doesn't cancel its siblings
+    if sys.version_info >= (3, 11):
+        async with asyncio.TaskGroup() as tg:
+            for key, file_path in uploads:
+                tg.create_task(upload_one(key, file_path))
+    else:
+        await asyncio.gather(*(upload_one(key, file_path) for key, file_path in uploads))
     logger.info("Sample file upload process finished.")
 
 
@@ -129,76 +349,54 @@ async def upload_sample_files(bot: Bot):
 
 async def handle_help_command(message: Message, bot: Bot):
     """Sends a help message listing available test commands."""
-    help_text = """*wa_cloud Test Bot Commands:*
-/help - Show this message
-/text - Send a simple text message
-/format - Send text with Markdown formatting
-/image - Send sample JPG image (run /upload first)
-/video - Send sample MP4 video (run /upload first)
-/audio - Send sample MP3 audio (run /upload first)
-/document - Send sample PDF document (run /upload first)
-/sticker - Send sample WEBP sticker (run /upload first)
-/location - Send a sample static location pin
-/contact - Send a sample contact card message
-/buttons - Send a message with interactive reply buttons
-/list - Send a message with an interactive list
-/cta - Send a message with an interactive Call-To-Action URL button
-/flow - Send a sample Flow message (requires valid Flow ID in code)
-/template - Send the 'hello_world' template message
-/react - React ❤️ to the last received message
-/unreact - Remove reaction from the last received message
-/mark_read - Mark the last received message as read
-/upload - Re-upload sample media files from ./sample_files
-/download <media_id> - Download media by its ID to ./downloads
-/delete <media_id> - Delete uploaded media by its ID"""
     try:
-        await bot.send_text(message.chat_id, help_text)
-    except Exception as e: logger.error(f"Failed to send help message: {e}")
+        await bot.send_text(message.chat_id, HELP_TEXT)
+    except Exception as e: logger.error("Failed to send help message: %s", e)
 
 async def handle_send_text_command(message: Message, bot: Bot):
     """Handles /text command: Sends a plain text message."""
-    logger.info(f"Command /text received from {message.chat_id}. Sending sample text.")
+    logger.info("Command /text received from %s. Sending sample text.", message.chat_id)
     try:
-        # Show typing indicator immediately upon receipt
-        await bot.mark_as_read(message.id, show_typing=True)
-
-        # Simulate some processing time
-        # await asyncio.sleep(0.5)
-
-        await bot.send_text(message.chat_id, "This is a test text message from the wa_cloud bot!")
-    
+        # Send the read receipt alongside the reply (independent API calls). No typing
+        # indicator: it could land after the reply and linger as a stale "typing..."
+        await asyncio.gather(
+            bot.mark_as_read(message.id, show_typing=False),
+            bot.send_text(message.chat_id, "This is a test text message from the wa_cloud bot!")
+        )
     except Exception as e: 
-        logger.error(f"Error sending text command response: {e}")
+        logger.error("Error sending text command response: %s", e)
 
 async def handle_send_format_command(message: Message, bot: Bot):
     """Handles /format command: Sends text with Markdown."""
-    logger.info(f"Command /format received from {message.chat_id}. Sending formatted text.")
+    logger.info("Command /format received from %s. Sending formatted text.", message.chat_id)
     formatted_message = "*Bold*, _Italic_, ~Strikethrough~, ```Monospace```"
     try:
-        await bot.mark_as_read(message.id, show_typing=True)
-        await bot.send_text(message.chat_id, formatted_message)
-    except Exception as e: logger.error(f"Error sending formatted text: {e}")
+        await asyncio.gather(
+            bot.mark_as_read(message.id, show_typing=False),
+            bot.send_text(message.chat_id, formatted_message)
+        )
+    except Exception as e: logger.error("Error sending formatted text: %s", e)
+
+# Maps a sample media type to the (unbound) Bot method that sends it
+_SENDERS = {
+    "image": Bot.send_image,
+    "video": Bot.send_video,
+    "audio": Bot.send_audio,
+    "document": Bot.send_document,
+    "sticker": Bot.send_sticker,
+}
 
 async def _send_sample_media(media_key: str, msg_type: str, bot: Bot, chat_id: str, **kwargs):
     """Internal helper to send different media types based on stored IDs."""
-    logger.info(f"Command /{msg_type} received from {chat_id}.")
-    media_id = last_media_ids.get(media_key)
+    logger.info("Command /%s received from %s.", msg_type, chat_id)
+    media_id = getattr(MEDIA_IDS, media_key)
     if media_id:
-        logger.info(f"Sending sample {msg_type} using ID: {media_id}")
+        logger.info("Sending sample %s using ID: %s", msg_type, media_id)
         try:
-            if msg_type == "image":
-                await bot.send_image(chat_id, media_id=media_id, **kwargs)
-            elif msg_type == "video":
-                await bot.send_video(chat_id, media_id=media_id, **kwargs)
-            elif msg_type == "audio":
-                await bot.send_audio(chat_id, media_id=media_id, **kwargs)
-            elif msg_type == "document":
-                await bot.send_document(chat_id, media_id=media_id, **kwargs)
-            elif msg_type == "sticker":
-                await bot.send_sticker(chat_id, media_id=media_id, **kwargs)
-        except Exception as e: logger.error(f"Error sending {msg_type}: {e}")
+            await _SENDERS[msg_type](bot, chat_id, media_id=media_id, **kwargs)
+        except Exception as e: logger.error("Error sending %s: %s", msg_type, e)
     else:
-        logger.warning(f"Cannot send {msg_type}: Sample media key '{media_key}' not found in uploaded IDs. Run /upload first.")
+        logger.warning("Cannot send %s: Sample media key '%s' not found in uploaded IDs. Run /upload first.", msg_type, media_key)
         await bot.send_text(chat_id, f"Sample {msg_type} media not uploaded. Run /upload first.")
 
 async def handle_send_image_command(message: Message, bot: Bot):
@@ -218,122 +416,104 @@ async def handle_send_sticker_command(message: Message, bot: Bot):
 
 async def handle_send_location_command(message: Message, bot: Bot):
     """Handles /location command: Sends a static location pin."""
-    logger.info(f"Command /location received from {message.chat_id}. Sending sample location.")
+    logger.info("Command /location received from %s. Sending sample location.", message.chat_id)
     try:
-        await bot.mark_as_read(message.id, show_typing=True)
-        await bot.send_location(
-            message.chat_id,
-            latitude=34.052235, longitude=-118.243683, # Los Angeles
-            name="Sample Location Pin", address="123 Example Blvd, Fakesville"
+        await asyncio.gather(
+            bot.mark_as_read(message.id, show_typing=False),
+            bot.send_location(
+                message.chat_id,
+                latitude=34.052235, longitude=-118.243683, # Los Angeles
+                name="Sample Location Pin", address="123 Example Blvd, Fakesville"
+            )
         )
-    except Exception as e: logger.error(f"Error sending location: {e}")
+    except Exception as e: logger.error("Error sending location: %s", e)
 
 async def handle_send_contact_command(message: Message, bot: Bot):
     """Handles /contact command: Sends a sample contact card."""
-    logger.info(f"Command /contact received from {message.chat_id}. Sending sample contact.")
+    logger.info("Command /contact received from %s. Sending sample contact.", message.chat_id)
     try:
-        await bot.mark_as_read(message.id, show_typing=True)
-        # Construct the ContactSend object using models
-        contact = ContactSend(
-            name=ContactNameSend(formatted_name="Sam T. Test", first_name="Sam", last_name="Test"),
-            phones=[ContactPhoneSend(phone="+15550001111", type="Mobile", wa_id="15550001111")], # Include wa_id for message button
-            emails=[ContactEmailSend(email="sam.test@example.com", type="Work")]
+        await asyncio.gather(
+            bot.mark_as_read(message.id, show_typing=False),
+            bot.send_contacts(message.chat_id, contacts=[SAMPLE_CONTACT])
         )
-        await bot.send_contacts(message.chat_id, contacts=[contact])
-    except Exception as e: logger.error(f"Error sending contact: {e}")
+    except Exception as e: logger.error("Error sending contact: %s", e)
 
 async def handle_send_buttons_command(message: Message, bot: Bot):
     """Handles /buttons command: Sends an interactive message with reply buttons."""
-    logger.info(f"Command /buttons received from {message.chat_id}. Sending interactive buttons.")
+    logger.info("Command /buttons received from %s. Sending interactive buttons.", message.chat_id)
     try:
-        # Define buttons as list of dicts
-        buttons = [
-            {"id": "reply_yes", "title": "Yes"},
-            {"id": "reply_no", "title": "No"},
-            {"id": "reply_maybe", "title": "Maybe"},
-        ]
         # Optionally define a header (text, image, video, document)
-        header_image_id = last_media_ids.get("image_png") # Use PNG for example
+        header_image_id = MEDIA_IDS.image_png # Use PNG for example
         header = None
         if header_image_id:
              header = InteractiveHeader(type="image", image=MediaBase(id=header_image_id))
         else:
-             header = InteractiveHeader(type="text", text="Button Demo Header")
+             header = _TEXT_HEADER_BUTTONS
              logger.warning("Sample PNG for button header not uploaded, using text header.")
 
-        await bot.mark_as_read(message.id, show_typing=True)
-        await bot.send_interactive_button(
-            message.chat_id,
-            body_text="Please select one of the options below.",
-            buttons=buttons,
-            header=header,
-            footer_text="Interactive Buttons Footer"
+        await asyncio.gather(
+            bot.mark_as_read(message.id, show_typing=False),
+            bot.send_interactive_button(
+                message.chat_id,
+                body_text="Please select one of the options below.",
+                buttons=SAMPLE_BUTTONS,
+                header=header,
+                footer_text="Interactive Buttons Footer"
+            )
         )
-    except Exception as e: logger.error(f"Error sending buttons: {e}")
+    except Exception as e: logger.error("Error sending buttons: %s", e)
 
 async def handle_send_list_command(message: Message, bot: Bot):
     """Handles /list command: Sends an interactive list message."""
-    logger.info(f"Command /list received from {message.chat_id}. Sending interactive list.")
+    logger.info("Command /list received from %s. Sending interactive list.", message.chat_id)
     try:
-        # Define sections and rows
-        sections = [
-            {
-                "title": "Category A",
-                "rows": [
-                    {"id": "a_item_1", "title": "Item A1", "description": "Description for A1"},
-                    {"id": "a_item_2", "title": "Item A2"}
-                ]
-            },
-            {
-                "title": "Category B",
-                "rows": [{"id": "b_item_1", "title": "Item B1"}]
-            }
-        ]
-        
-        await bot.mark_as_read(message.id, show_typing=True)
-        
         # Lists only support text headers
-        header = InteractiveHeader(type="text", text="Choose from List")
-        await bot.send_interactive_list(
-            message.chat_id,
-            body_text="Select one item from the categories.",
-            button_text="Show Items", # Text on button to open list
-            sections=sections,
-            header=header,
-            footer_text="List Message Footer"
+        header = _TEXT_HEADER_CHOOSE
+        await asyncio.gather(
+            bot.mark_as_read(message.id, show_typing=False),
+            bot.send_interactive_list(
+                message.chat_id,
+                body_text="Select one item from the categories.",
+                button_text="Show Items", # Text on button to open list
+                sections=SAMPLE_LIST_SECTIONS,
+                header=header,
+                footer_text="List Message Footer"
+            )
         )
-    except Exception as e: logger.error(f"Error sending list: {e}")
+    except Exception as e: logger.error("Error sending list: %s", e)
 
 async def handle_send_cta_command(message: Message, bot: Bot):
     """Handles /cta command: Sends an interactive Call-To-Action URL button."""
-    logger.info(f"Command /cta received from {message.chat_id}. Sending CTA URL.")
+    logger.info("Command /cta received from %s. Sending CTA URL.", message.chat_id)
     try:
-        await bot.mark_as_read(message.id, show_typing=True)
-
-        header = InteractiveHeader(type="text", text="Learn More")
-        await bot.send_interactive_cta_url(
-            message.chat_id,
-            body_text="Visit the official WhatsApp Cloud API documentation.",
-            display_text="Visit Docs", # Button text
-            url="https://developers.facebook.com/docs/whatsapp/cloud-api/",
-            header=header,
-            footer_text="Opens developer portal"
+        header = _TEXT_HEADER_LEARN
+        await asyncio.gather(
+            bot.mark_as_read(message.id, show_typing=False),
+            bot.send_interactive_cta_url(
+                message.chat_id,
+                body_text="Visit the official WhatsApp Cloud API documentation.",
+                display_text="Visit Docs", # Button text
+                url="https://developers.facebook.com/docs/whatsapp/cloud-api/",
+                header=header,
+                footer_text="Opens developer portal"
+            )
         )
-    except Exception as e: logger.error(f"Error sending CTA URL: {e}")
+    except Exception as e: logger.error("Error sending CTA URL: %s", e)
 
 async def handle_send_flow_command(message: Message, bot: Bot):
     """Handles /flow command: Sends a sample Flow message (requires configuration)."""
-    logger.info(f"Command /flow received from {message.chat_id}. Sending sample Flow.")
+    logger.info("Command /flow received from %s. Sending sample Flow.", message.chat_id)
     # !!! IMPORTANT: Replace 'YOUR_FLOW_ID_HERE' with an actual Flow ID from your WhatsApp Manager !!!
     flow_id_to_use = "YOUR_FLOW_ID_HERE"
     # !!! IMPORTANT: Replace 'YOUR_START_SCREEN_ID' with the ID of the first screen in your Flow !!!
     start_screen_id = "YOUR_START_SCREEN_ID"
 
     if flow_id_to_use == "YOUR_FLOW_ID_HERE" or start_screen_id == "YOUR_START_SCREEN_ID":
-         await bot.mark_as_read(message.id, show_typing=True)
-
          logger.warning("Flow ID or Start Screen ID placeholder not replaced in the code.")
-         await bot.send_text(message.chat_id, "Cannot send Flow: Please replace placeholders 'YOUR_FLOW_ID_HERE' and 'YOUR_START_SCREEN_ID' in the `full_test_bot.py` script with your actual Flow details.")
+         await asyncio.gather(
+             bot.mark_as_read(message.id, show_typing=False),
+             bot.send_text(message.chat_id, "Cannot send Flow: Please replace placeholders 'YOUR_FLOW_ID_HERE' and 'YOUR_START_SCREEN_ID' in the `full_test_bot.py` script with your actual Flow details.")
+         )
          return
 
     try:
@@ -350,260 +530,285 @@ async def handle_send_flow_command(message: Message, bot: Bot):
             mode="published" # Use "draft" to test draft versions
         )
         action = InteractiveActionFlow(parameters=flow_params)
-        header = InteractiveHeader(type="text", text="Initiate Flow")
-
-        await bot.mark_as_read(message.id, show_typing=True)
-
-        await bot.send_interactive_flow(
-            message.chat_id,
-            body_text="Tap the button below to begin the interactive flow.",
-            action=action,
-            header=header,
-            footer_text="Flow testing"
+        header = _TEXT_HEADER_FLOW
+
+        await asyncio.gather(
+            bot.mark_as_read(message.id, show_typing=False),
+            bot.send_interactive_flow(
+                message.chat_id,
+                body_text="Tap the button below to begin the interactive flow.",
+                action=action,
+                header=header,
+                footer_text="Flow testing"
+            )
         )
-    except Exception as e: logger.error(f"Error sending Flow: {e}")
+    except Exception as e: logger.error("Error sending Flow: %s", e)
 
 async def handle_send_template_command(message: Message, bot: Bot):
     """Handles /template command: Sends the standard 'hello_world' template."""
-    logger.info(f"Command /template received from {message.chat_id}. Sending 'hello_world' template.")
+    logger.info("Command /template received from %s. Sending 'hello_world' template.", message.chat_id)
     # Assumes the default 'hello_world' template is available and approved in your WABA.
-    template_name = "hello_world"
-    language_code = "en_US" # Default language for hello_world
+    template_name = HELLO_WORLD_TEMPLATE.name
     try:
-        # Construct the TemplateSend object (hello_world has no variables/components)
-        template_payload = TemplateSend(
-            name=template_name,
-            language=TemplateLanguage(code=language_code)
-            # No components needed for the basic hello_world template
+        await asyncio.gather(
+            bot.mark_as_read(message.id, show_typing=False),
+            bot.send_template(message.chat_id, template=HELLO_WORLD_TEMPLATE)
         )
-        await bot.mark_as_read(message.id, show_typing=True)
-
-        await bot.send_template(message.chat_id, template=template_payload)
     except APIError as e:
-         logger.error(f"API Error sending template '{template_name}': {e}")
-         await bot.mark_as_read(message.id, show_typing=True)
-         await bot.send_text(message.chat_id, f"Failed to send template '{template_name}'. Check if it exists and is approved. Error: {e}")
-    except Exception as e: logger.error(f"Unexpected error sending template: {e}")
+         logger.error("API Error sending template '%s': %s", template_name, e)
+         await asyncio.gather(
+             bot.mark_as_read(message.id, show_typing=False),
+             bot.send_text(message.chat_id, f"Failed to send template '{template_name}'. Check if it exists and is approved. Error: {e}")
+         )
+    except Exception as e: logger.error("Unexpected error sending template: %s", e)
 
 async def handle_react_command(message: Message, bot: Bot):
     """Handles /react command: Sends a ❤️ reaction to the last user message."""
-    logger.info(f"Command /react received from {message.chat_id}.")
-
-    target_id = message.id
-    logger.info(f"Attempting to react to message ID: {target_id}")
+    logger.info("Command /react received from %s.", message.chat_id)
+    target_id = await _last_wamid_or_reply(message, bot)
+    if target_id is None:
+        return
+    logger.info("Attempting to react to message ID: %s", target_id)
     try:
         await bot.send_reaction(message.chat_id, message_id=target_id, emoji="❤️")
-        logger.info(f"Reaction sent to message {target_id}")
+        logger.info("Reaction sent to message %s", target_id)
     except Exception as e:
-        logger.error(f"Error sending reaction to {target_id}: {e}")
+        logger.error("Error sending reaction to %s: %s", target_id, e)
         await bot.send_text(message.chat_id, f"Failed to react to message {target_id}. Error: {e}")
 
 async def handle_unreact_command(message: Message, bot: Bot):
     """Handles /unreact command: Removes reaction from the last user message."""
-    logger.info(f"Command /unreact received from {message.chat_id}.")
-    
-    target_id = message.id
-    logger.info(f"Attempting to remove reaction from message ID: {target_id}")
+    logger.info("Command /unreact received from %s.", message.chat_id)
+    target_id = await _last_wamid_or_reply(message, bot)
+    if target_id is None:
+        return
+    logger.info("Attempting to remove reaction from message ID: %s", target_id)
     try:
         # Send empty emoji string to remove reaction
         await bot.send_reaction(message.chat_id, message_id=target_id, emoji="")
-        logger.info(f"Un-reaction sent for message {target_id}")
+        logger.info("Un-reaction sent for message %s", target_id)
     except Exception as e:
-        logger.error(f"Error removing reaction from {target_id}: {e}")
+        logger.error("Error removing reaction from %s: %s", target_id, e)
         await bot.send_text(message.chat_id, f"Failed to remove reaction from {target_id}. Error: {e}")
 
 async def handle_mark_read_command(message: Message, bot: Bot):
     """Handles /mark_read command: Marks the last received message as read."""
-    logger.info(f"Command /mark_read received from {message.chat_id}.")
-    target_id = message.id
-
-    logger.info(f"Attempting to mark message as read: {target_id}")
+    logger.info("Command /mark_read received from %s.", message.chat_id)
+    target_id = await _last_wamid_or_reply(message, bot)
+    if target_id is None:
+        return
+    logger.info("Attempting to mark message as read: %s", target_id)
     try:
         success = await bot.mark_as_read(target_id)
-        logger.info(f"Mark as read result for {target_id}: {success}")
+        logger.info("Mark as read result for %s: %s", target_id, success)
         await bot.send_text(message.chat_id, f"Mark as read successful for {target_id}: {success}")
     except Exception as e:
-        logger.error(f"Error marking message {target_id} as read: {e}")
+        logger.error("Error marking message %s as read: %s", target_id, e)
         await bot.send_text(message.chat_id, f"Failed to mark message {target_id} as read. Error: {e}")
 
 
 async def handle_upload_command(message: Message, bot: Bot):
     """Handles /upload command: Re-uploads sample files."""
-    logger.info(f"Command /upload received from {message.chat_id}. Re-uploading sample files.")
-    await bot.mark_as_read(message.id, show_typing=True)
-    await bot.send_text(message.chat_id, "Starting sample file upload...")
-    await bot.mark_as_read(message.id, show_typing=True)
-    await upload_sample_files(bot) # Call the async helper
-    await bot.send_text(message.chat_id, f"Sample file upload complete. Current Media IDs: {last_media_ids}")
+    logger.info("Command /upload received from %s. Re-uploading sample files.", message.chat_id)
+    await asyncio.gather(
+        bot.mark_as_read(message.id, show_typing=False),
+        bot.send_text(message.chat_id, "Starting sample file upload...")
+    )
+    # Keep the typing indicator up while the uploads run
+    await asyncio.gather(
+        bot.mark_as_read(message.id, show_typing=True),
+        upload_sample_files(bot) # Call the async helper
+    )
+    await bot.send_text(message.chat_id, f"Sample file upload complete. Current Media IDs: {MEDIA_IDS}")
 
 async def handle_download_command(message: Message, bot: Bot):
     """Handles /download <media_id> command: Downloads specified media."""
-    logger.info(f"Command /download received from {message.chat_id}")
-    parts = message.text.body.split(maxsplit=1)
-    await bot.mark_as_read(message.id, show_typing=True)
-    if len(parts) < 2:
-        await bot.send_text(message.chat_id, "Usage: /download <media_id>")
-        return
-
-    media_id_to_download = parts[1].strip()
+    logger.info("Command /download received from %s", message.chat_id)
+    # Split on any whitespace, like the command filter ("/download\n<id>" from mobile)
+    args = message.text.body.split(None, 1)[1:]
+    media_id_to_download = args[0].strip() if args else ""
     if not media_id_to_download:
-         await bot.send_text(message.chat_id, "Please provide a valid media ID after /download.")
-         return
+        await asyncio.gather(
+            bot.mark_as_read(message.id, show_typing=False),
+            bot.send_text(message.chat_id, "Usage: /download <media_id>")
+        )
+        return
 
-    logger.info(f"Attempting to download media with ID: {media_id_to_download}")
-    await bot.send_text(message.chat_id, f"Attempting download for media ID: {media_id_to_download}...")
-    await bot.mark_as_read(message.id, show_typing=True)
+    logger.info("Attempting to download media with ID: %s", media_id_to_download)
+    await asyncio.gather(
+        bot.mark_as_read(message.id, show_typing=False),
+        bot.send_text(message.chat_id, f"Attempting download for media ID: {media_id_to_download}...")
+    )
     try:
-        
-        # 1. Get media info (URL and crucially, MIME type for extension)
-        info = await bot.get_media_info(media_id_to_download)
-        logger.info(f"Obtained media info: URL={info.url}, MIME={info.mime_type}")
+        # 1. Get media info (URL and crucially, MIME type for extension),
+        # showing the typing indicator again while it is fetched
+        _, info = await asyncio.gather(
+            bot.mark_as_read(message.id, show_typing=True),
+            bot.get_media_info(media_id_to_download)
+        )
+        logger.info("Obtained media info: URL=%s, MIME=%s", info.url, info.mime_type)
 
         # 2. Construct the full destination file path
-        # Ensure downloads directory exists
-        DOWNLOADS_DIR.mkdir(parents=True, exist_ok=True)
         # Guess file extension from MIME type
-        extension = mimetypes.guess_extension(info.mime_type) or ".bin" # Use .bin as default fallback
+        extension = _ext_for(info.mime_type)
         # Create filename using media_id and extension
         dest_file_path = DOWNLOADS_DIR / f"{media_id_to_download}{extension}"
-        logger.info(f"Calculated destination path: {dest_file_path}")
+        logger.info("Calculated destination path: %s", dest_file_path)
 
         # 3. Call the simplified download_media with the full path
         file_path = await bot.download_media(info.url, dest_path=dest_file_path)
 
-        logger.info(f"Successfully downloaded media to {file_path}")
+        logger.info("Successfully downloaded media to %s", file_path)
         await bot.send_text(message.chat_id, f"Successfully downloaded media to: {dest_file_path.name}") # Send only filename back
 
     except ValueError as e: # Catch specific errors like missing mime type if logic changes
-        logger.error(f"Value error during download for {media_id_to_download}: {e}")
+        logger.error("Value error during download for %s: %s", media_id_to_download, e)
         await bot.send_text(message.chat_id, f"Download error: {e}")
     except (APIError, NetworkError, WhatsAppError) as e: # Catch library-specific errors
-        logger.error(f"Library error downloading media {media_id_to_download}: {e}")
+        logger.error("Library error downloading media %s: %s", media_id_to_download, e)
         await bot.send_text(message.chat_id, f"Failed to download media (Error: {type(e).__name__}). Check logs.")
     except FileNotFoundError as e: # If get_media_info fails for bad ID
-        logger.error(f"Could not get info for media {media_id_to_download}: {e}")
+        logger.error("Could not get info for media %s: %s", media_id_to_download, e)
         await bot.send_text(message.chat_id, f"Cannot get info for media ID '{media_id_to_download}'. Does it exist?")
     except Exception as e: # Catch any other unexpected errors
-        logger.exception(f"Unexpected error during download command for {media_id_to_download}")
+        logger.exception("Unexpected error during download command for %s", media_id_to_download)
         await bot.send_text(message.chat_id, "An unexpected error occurred during download. Please check server logs.")
 
 async def handle_delete_media_command(message: Message, bot: Bot):
     """Handles /delete <media_id> command: Deletes specified uploaded media."""
-    logger.info(f"Command /delete received from {message.chat_id}")
-    parts = message.text.body.split(maxsplit=1)
-    
-    await bot.mark_as_read(message.id, show_typing=True)
-
-    if len(parts) < 2:
-        await bot.send_text(message.chat_id, "Usage: /delete <media_id>")
-        return
-
-    media_id_to_delete = parts[1].strip()
+    logger.info("Command /delete received from %s", message.chat_id)
+    # Split on any whitespace, like the command filter ("/delete\n<id>" from mobile)
+    args = message.text.body.split(None, 1)[1:]
+    media_id_to_delete = args[0].strip() if args else ""
     if not media_id_to_delete:
-         await bot.send_text(message.chat_id, "Please provide a valid media ID after /delete.")
-         return
+        await asyncio.gather(
+            bot.mark_as_read(message.id, show_typing=False),
+            bot.send_text(message.chat_id, "Usage: /delete <media_id>")
+        )
+        return
 
-    logger.info(f"Attempting to delete media with ID: {media_id_to_delete}")
-    await bot.send_text(message.chat_id, f"Attempting to delete media ID: {media_id_to_delete}...")
-    await bot.mark_as_read(message.id, show_typing=True)
+    logger.info("Attempting to delete media with ID: %s", media_id_to_delete)
+    await asyncio.gather(
+        bot.mark_as_read(message.id, show_typing=False),
+        bot.send_text(message.chat_id, f"Attempting to delete media ID: {media_id_to_delete}...")
+    )
 
     try:
-        success = await bot.delete_media(media_id_to_delete)
-        logger.info(f"Deletion result for {media_id_to_delete}: {success}")
+        # Show the typing indicator again while the deletion runs
+        _, success = await asyncio.gather(
+            bot.mark_as_read(message.id, show_typing=True),
+            bot.delete_media(media_id_to_delete)
+        )
+        logger.info("Deletion result for %s: %s", media_id_to_delete, success)
         # Remove from our simple cache if successful
         if success:
-             keys_to_del = [key for key, value in last_media_ids.items() if value == media_id_to_delete]
-             for key in keys_to_del:
-                 del last_media_ids[key]
-                 logger.info(f"Removed '{key}' from cached media IDs.")
+             for key in MEDIA_IDS.discard(media_id_to_delete):
+                 logger.info("Removed '%s' from cached media IDs.", key)
         await bot.send_text(message.chat_id, f"Delete media result for '{media_id_to_delete}': {success}")
     except Exception as e: # Catch potential errors during the delete call itself
-        logger.exception(f"Unexpected error during delete command for {media_id_to_delete}")
+        logger.exception("Unexpected error during delete command for %s", media_id_to_delete)
         await bot.send_text(message.chat_id, f"An error occurred while trying to delete media {media_id_to_delete}.")
 
 # 2. Handlers for Processing Incoming User Messages
 async def handle_incoming_text(message: Message, bot: Bot):
     """Handles regular text messages (non-commands). Stores WAMID."""
-    global last_received_wamid
-    last_received_wamid = message.id
+    STATE.remember(message)
     text_body = message.text.body if message.text else "[No Text Body]"
-    logger.info(f"Incoming text from {message.chat_id}: '{text_body}' (Stored WAMID: {message.id})")
+    logger.info("Incoming text from %s: '%s' (Stored WAMID: %s)", message.chat_id, text_body, message.id)
     # Simple acknowledgement - avoid echoing back directly to prevent loops
     try:
-        await bot.mark_as_read(message.id, show_typing=True)
+        _fire_and_forget(_send_read_receipt(bot, message.id))
         await bot.send_text(message.chat_id, f"Received text. Use /help for test commands.")
-    except Exception as e: logger.error(f"Error sending ACK for incoming text: {e}")
+    except Exception as e: logger.error("Error sending ACK for incoming text: %s", e)
 
 async def handle_incoming_media(message: Message, bot: Bot):
     """Handles incoming media messages (image, video, etc.). Stores WAMID."""
-    global last_received_wamid
-    last_received_wamid = message.id
+    STATE.remember(message)
     media_type = message.message_type.value # Get the string value like "image"
     media_id = message.media_id or "[No Media ID]"
-    caption_info = f" Caption: '{message.caption}'" if message.caption else ""
-    filename_info = f" Filename: '{message.filename}'" if message.filename else ""
-    logger.info(f"Incoming {media_type} from {message.chat_id}. Media ID: {media_id}{caption_info}{filename_info}")
+    # The caption/filename details are only logged, so skip building them when INFO is off
+    if logger.isEnabledFor(logging.INFO):
+        caption_info = f" Caption: '{message.caption}'" if message.caption else ""
+        filename_info = f" Filename: '{message.filename}'" if message.filename else ""
+        logger.info("Incoming %s from %s. Media ID: %s%s%s", media_type, message.chat_id, media_id, caption_info, filename_info)
     try:
-        await bot.mark_as_read(message.id, show_typing=True)
+        _fire_and_forget(_send_read_receipt(bot, message.id))
         await bot.send_text(message.chat_id, f"Received your {media_type}! Media ID: {media_id}. Use `/download {media_id}` to test download.")
-    except Exception as e: logger.error(f"Error sending ACK for incoming media: {e}")
+    except Exception as e: logger.error("Error sending ACK for incoming media: %s", e)
 
 async def handle_incoming_location(message: Message, bot: Bot):
     """Handles incoming location messages. Stores WAMID."""
-    global last_received_wamid
-    last_received_wamid = message.id
+    STATE.remember(message)
     loc = message.location
-    loc_str = f"Lat={loc.latitude}, Lon={loc.longitude}" if loc else "[No Location Data]"
-    if loc:
-        if loc.name: loc_str += f", Name='{loc.name}'"
-        if loc.address: loc_str += f", Address='{loc.address}'"
-    logger.info(f"Incoming location from {message.chat_id}: {loc_str}")
+    # loc_str is only logged, so skip building it when INFO is off
+    if logger.isEnabledFor(logging.INFO):
+        loc_str = f"Lat={loc.latitude}, Lon={loc.longitude}" if loc else "[No Location Data]"
+        if loc:
+            if loc.name: loc_str += f", Name='{loc.name}'"
+            if loc.address: loc_str += f", Address='{loc.address}'"
+        logger.info("Incoming location from %s: %s", message.chat_id, loc_str)
     try:
         ack_text = f"Received location: {loc.latitude}, {loc.longitude}" if loc else "Received location message, but data was missing."
-        await bot.mark_as_read(message.id, show_typing=True)
+        _fire_and_forget(_send_read_receipt(bot, message.id))
         await bot.send_text(message.chat_id, ack_text)
-    except Exception as e: logger.error(f"Error sending ACK for incoming location: {e}")
+    except Exception as e: logger.error("Error sending ACK for incoming location: %s", e)
 
 async def handle_incoming_contacts(message: Message, bot: Bot):
     """Handles incoming contact card messages. Stores WAMID."""
-    global last_received_wamid
-    last_received_wamid = message.id
+    STATE.remember(message)
     contact_names = [c.name.formatted_name for c in message.contacts] if message.contacts else []
     count = len(contact_names)
     names_str = ', '.join(contact_names) if contact_names else "[No Contacts]"
-    logger.info(f"Incoming contacts ({count}) from {message.chat_id}: {names_str}")
+    logger.info("Incoming contacts (%s) from %s: %s", count, message.chat_id, names_str)
     try:
-        await bot.mark_as_read(message.id, show_typing=True)
+        _fire_and_forget(_send_read_receipt(bot, message.id))
         await bot.send_text(message.chat_id, f"Received {count} contact(s): {names_str}")
-    except Exception as e: logger.error(f"Error sending ACK for incoming contacts: {e}")
+    except Exception as e: logger.error("Error sending ACK for incoming contacts: %s", e)
+
+def _describe_unhandled(interactive) -> Tuple[str, str]:
+    """Default description for interactive types (or missing replies) without a describer."""
+    return f"Unhandled Interactive Type ({interactive.type})", "N/A"
+
+def _describe_button_reply(interactive) -> Tuple[str, str]:
+    """Returns (reply type, reply info) for a button reply."""
+    reply = interactive.button_reply
+    if not reply:
+        return _describe_unhandled(interactive)
+    return "Button Reply", f"ID={reply.id!r}, Title={reply.title!r}"
+
+def _describe_list_reply(interactive) -> Tuple[str, str]:
+    """Returns (reply type, reply info) for a list reply."""
+    reply = interactive.list_reply
+    if not reply:
+        return _describe_unhandled(interactive)
+    parts = [f"ID={reply.id!r}", f"Title={reply.title!r}"]
+    if reply.description:
+        parts.append(f"Desc={reply.description!r}")
+    return "List Reply", ", ".join(parts)
+
+# Maps an incoming interactive reply type to the function describing it;
+# anything else falls back to _describe_unhandled.
+# InteractiveType is a str Enum, so the raw type string from the model looks up fine.
+_INTERACTIVE_HANDLERS: Dict[str, Callable[[Any], Tuple[str, str]]] = {
+    InteractiveType.BUTTON_REPLY: _describe_button_reply,
+    InteractiveType.LIST_REPLY: _describe_list_reply,
+}
 
 async def handle_incoming_interactive(message: Message, bot: Bot):
     """Handles replies from interactive messages (buttons/lists). Stores WAMID."""
-    global last_received_wamid
-    last_received_wamid = message.id
-    reply_type_str = "Unknown Interactive"
-    reply_info_str = "N/A"
-
+    STATE.remember(message)
     if message.interactive:
-        # Determine the type of reply and extract relevant info
-        if message.interactive.type == InteractiveType.BUTTON_REPLY and message.interactive.button_reply:
-            reply = message.interactive.button_reply
-            reply_type_str = "Button Reply"
-            reply_info_str = f"ID='{reply.id}', Title='{reply.title}'"
-        elif message.interactive.type == InteractiveType.LIST_REPLY and message.interactive.list_reply:
-            reply = message.interactive.list_reply
-            reply_type_str = "List Reply"
-            reply_info_str = f"ID='{reply.id}', Title='{reply.title}'"
-            if reply.description:
-                reply_info_str += f", Desc='{reply.description}'"
-        else:
-            reply_type_str = f"Unhandled Interactive Type ({message.interactive.type})"
+        # Pick the describer with one dict lookup, no branching on the type
+        describe = _INTERACTIVE_HANDLERS.get(message.interactive.type, _describe_unhandled)
+        reply_type_str, reply_info_str = describe(message.interactive)
+    else:
+        reply_type_str, reply_info_str = "Unknown Interactive", "N/A"
 
-    logger.info(f"Incoming {reply_type_str} from {message.chat_id}: {reply_info_str}")
+    logger.info("Incoming %s from %s: %s", reply_type_str, message.chat_id, reply_info_str)
     try:
-        await bot.mark_as_read(message.id, show_typing=True)
+        _fire_and_forget(_send_read_receipt(bot, message.id))
         await bot.send_text(message.chat_id, f"Received your {reply_type_str}: {reply_info_str}")
-    except Exception as e: logger.error(f"Error sending ACK for interactive reply: {e}")
+    except Exception as e: logger.error("Error sending ACK for interactive reply: %s", e)
 
 async def handle_incoming_reaction(message: Message, bot: Bot):
     """Handles incoming reaction messages (user reacting to bot's message)."""
@@ -611,24 +816,99 @@ async def handle_incoming_reaction(message: Message, bot: Bot):
     if message.reaction:
         emoji = message.reaction.emoji or "[Reaction Removed]"
         target_id = message.reaction.message_id
-        logger.info(f"Incoming reaction from {message.chat_id}: Emoji='{emoji}', Target WAMID='{target_id}'")
+        logger.info("Incoming reaction from %s: Emoji='%s', Target WAMID='%s'", message.chat_id, emoji, target_id)
         # It's often best practice *not* to send a message in response to a reaction.
         # try:
         #     await bot.send_text(message.chat_id, f"Thanks for the reaction: {emoji}")
         # except Exception as e: logger.error(f"Error sending ACK for incoming reaction: {e}")
     else:
-        logger.warning(f"Received reaction message from {message.chat_id} but reaction object was missing.")
+        logger.warning("Received reaction message from %s but reaction object was missing.", message.chat_id)
     # Cannot mark reactions as read
 
 async def handle_unsupported(message: Message, bot: Bot):
     """Handles any message type not explicitly covered by other handlers."""
-    global last_received_wamid
-    last_received_wamid = message.id # Store WAMID even if unsupported
-    logger.warning(f"Received unhandled message type '{message.type}' from {message.chat_id}. WAMID: {message.id}")
+    STATE.remember(message) # Store WAMID even if unsupported
+    logger.warning("Received unhandled message type '%s' from %s. WAMID: %s", message.type, message.chat_id, message.id)
     try:
-        await bot.mark_as_read(message.id, show_typing=True)
-        await bot.send_text(message.chat_id, f"Sorry, I received a message of type '{message.type}' which I don't know how to process yet.")
-    except Exception as e: logger.error(f"Error sending ACK for unsupported message type: {e}")
+        _fire_and_forget(_send_read_receipt(bot, message.id))
+        if SETTINGS.send_unsupported_ack:
+            await bot.send_text(message.chat_id, f"Sorry, I received a message of type '{message.type}' which I don't know how to process yet.")
+    except Exception as e: logger.error("Error sending ACK for unsupported message type: %s", e)
+
+
+# --- Handler Filters ---
+# Built once at import and shared by every dispatch (filters are stateless)
+_CMD = filters.TEXT & filters.ANY_COMMAND
+_NON_CMD = ~filters.ANY_COMMAND
+_TEXT_NCMD = filters.TEXT & _NON_CMD
+_IMAGE_NCMD = filters.IMAGE & _NON_CMD
+_VIDEO_NCMD = filters.VIDEO & _NON_CMD
+_AUDIO_NCMD = filters.AUDIO & _NON_CMD
+_DOCUMENT_NCMD = filters.DOCUMENT & _NON_CMD
+_STICKER_NCMD = filters.STICKER & _NON_CMD
+_LOCATION_NCMD = filters.LOCATION & _NON_CMD
+_CONTACTS_NCMD = filters.CONTACTS & _NON_CMD
+_INTERACTIVE_NCMD = filters.INTERACTIVE & _NON_CMD
+_REACTION_NCMD = filters.REACTION & _NON_CMD
+_UNSUPPORTED_NCMD = filters.ALL & _NON_CMD & ~filters.INTERACTIVE
+
+# --- Command Dispatch ---
+# Maps the bare command name ("help" for "/help") to its handler
+COMMANDS = {
+    "help": handle_help_command,
+    "text": handle_send_text_command,
+    "format": handle_send_format_command,
+    "image": handle_send_image_command,
+    "video": handle_send_video_command,
+    "audio": handle_send_audio_command,
+    "document": handle_send_document_command,
+    "sticker": handle_send_sticker_command,
+    "location": handle_send_location_command,
+    "contact": handle_send_contact_command,
+    "buttons": handle_send_buttons_command,
+    "list": handle_send_list_command,
+    "cta": handle_send_cta_command,
+    "flow": handle_send_flow_command,
+    "template": handle_send_template_command,
+    "react": handle_react_command,
+    "unreact": handle_unreact_command,
+    "mark_read": handle_mark_read_command,
+    "upload": handle_upload_command,
+    "download": handle_download_command,
+    "delete": handle_delete_media_command,
+}
+
+async def handle_command(message: Message, bot: Bot):
+    """Routes a '/command' text to its handler with a single dict lookup."""
+    # _CMD guarantees a leading '/'. Split on any whitespace like CommandFilter does
+    # ("/download\n<id>"), and strip exactly one slash so "//help" doesn't match.
+    cmd = message.text.body.split(maxsplit=1)[0][1:].lower()
+    handler = COMMANDS.get(cmd)
+    if handler is None:
+        logger.debug("Ignoring unknown command '/%s' from %s", cmd, message.chat_id)
+        return
+    await handler(message, bot)
+
+
+# --- Routing Table ---
+# (filter, callback) pairs registered in order by main(). Commands come first;
+# a single router handles every command via the COMMANDS dispatch table.
+_ROUTES: Tuple[Tuple[BaseFilter, Callable[[Message, Bot], Awaitable[None]]], ...] = (
+    (_CMD, handle_command),
+    # Incoming message handlers (the filters exclude commands via _NON_CMD)
+    (_TEXT_NCMD, handle_incoming_text),
+    (_IMAGE_NCMD, handle_incoming_media),
+    (_VIDEO_NCMD, handle_incoming_media),
+    (_AUDIO_NCMD, handle_incoming_media),
+    (_DOCUMENT_NCMD, handle_incoming_media),
+    (_STICKER_NCMD, handle_incoming_media),
+    (_LOCATION_NCMD, handle_incoming_location),
+    (_CONTACTS_NCMD, handle_incoming_contacts),
+    (_INTERACTIVE_NCMD, handle_incoming_interactive),
+    (_REACTION_NCMD, handle_incoming_reaction),
+    # Catch-all (optional, should be last if used)
+    (_UNSUPPORTED_NCMD, handle_unsupported),
+)
 
 
 # --- Main Application Setup ---
@@ -637,76 +917,63 @@ def main() -> FastAPI: # Add return type hint
     logger.info("--- Starting Bot Setup ---")
 
     # 1. Create Bot instance
-    bot = Bot(token=WHATSAPP_TOKEN, phone_number_id=PHONE_NUMBER_ID)
+    # One pooled HTTP/2 client is shared by every Bot call (handlers fan out via gather).
+    # It is owned by this module and closed by the lifespan below, not by the Bot.
+    http_client = create_async_client(
+        http2=True,
+        max_connections=100,
+        max_keepalive_connections=50,
+        timeout=10.0,
+    )
+    bot = Bot(
+        token=SETTINGS.whatsapp_token,
+        phone_number_id=SETTINGS.phone_number_id,
+        default_timeout=10.0,
+        http_client=http_client,
+    )
     logger.info("Bot instance created.")
 
     # 2. Create Application instance
-    application = Application(bot=bot)
+    # Handlers for a multi-message webhook already run as concurrent tasks;
+    # cap them so a burst doesn't exceed the Graph API rate limits
+    application = Application(bot=bot, concurrency_limit=10)
     logger.info("Application instance created.")
 
-    # --- Schedule Initial Sample File Upload ---
-    # We run this after the event loop starts using FastAPI's startup event
-    async def run_startup_uploads():
-        logger.info("Running startup tasks: Uploading sample files...")
-        # Optional short delay if needed for event loop stabilization
-        # await asyncio.sleep(0.5)
-        await upload_sample_files(bot)
-        logger.info("Startup sample file upload task finished.")
-
-    # Store the task function to be added to FastAPI startup later
-    startup_tasks = [run_startup_uploads]
-
-    # 3. Define Handlers
-    # Command handlers should generally come first
-    command_handlers = [
-        MessageHandler(filters.Command("help"), handle_help_command),
-        MessageHandler(filters.Command("text"), handle_send_text_command),
-        MessageHandler(filters.Command("format"), handle_send_format_command),
-        MessageHandler(filters.Command("image"), handle_send_image_command),
-        MessageHandler(filters.Command("video"), handle_send_video_command),
-        MessageHandler(filters.Command("audio"), handle_send_audio_command),
-        MessageHandler(filters.Command("document"), handle_send_document_command),
-        MessageHandler(filters.Command("sticker"), handle_send_sticker_command),
-        MessageHandler(filters.Command("location"), handle_send_location_command),
-        MessageHandler(filters.Command("contact"), handle_send_contact_command),
-        MessageHandler(filters.Command("buttons"), handle_send_buttons_command),
-        MessageHandler(filters.Command("list"), handle_send_list_command),
-        MessageHandler(filters.Command("cta"), handle_send_cta_command),
-        MessageHandler(filters.Command("flow"), handle_send_flow_command),
-        MessageHandler(filters.Command("template"), handle_send_template_command),
-        MessageHandler(filters.Command("react"), handle_react_command),
-        MessageHandler(filters.Command("unreact"), handle_unreact_command),
-        MessageHandler(filters.Command("mark_read"), handle_mark_read_command),
-        MessageHandler(filters.Command("upload"), handle_upload_command),
-        MessageHandler(filters.Command("download"), handle_download_command),
-        MessageHandler(filters.Command("delete"), handle_delete_media_command),
-    ]
-    # Incoming message handlers (use ~filters.ANY_COMMAND to exclude commands)
-    message_handlers = [
-        MessageHandler(filters.TEXT & ~filters.ANY_COMMAND, handle_incoming_text),
-        MessageHandler(filters.IMAGE & ~filters.ANY_COMMAND, handle_incoming_media),
-        MessageHandler(filters.VIDEO & ~filters.ANY_COMMAND, handle_incoming_media),
-        MessageHandler(filters.AUDIO & ~filters.ANY_COMMAND, handle_incoming_media),
-        MessageHandler(filters.DOCUMENT & ~filters.ANY_COMMAND, handle_incoming_media),
-        MessageHandler(filters.STICKER & ~filters.ANY_COMMAND, handle_incoming_media),
-        MessageHandler(filters.LOCATION & ~filters.ANY_COMMAND, handle_incoming_location),
-        MessageHandler(filters.CONTACTS & ~filters.ANY_COMMAND, handle_incoming_contacts),
-        MessageHandler(filters.INTERACTIVE & ~filters.ANY_COMMAND, handle_incoming_interactive),
-        MessageHandler(filters.REACTION & ~filters.ANY_COMMAND, handle_incoming_reaction),
-        # Catch-all (optional, should be last if used)
-        MessageHandler(filters.ALL & ~filters.ANY_COMMAND & ~filters.INTERACTIVE, handle_unsupported),
-    ]
-
-    # 4. Add Handlers to Application
-    application.add_handlers(command_handlers)
-    application.add_handlers(message_handlers)
+    # 3. Add Handlers to Application, in _ROUTES order
+    application.add_handlers([MessageHandler(flt, callback) for flt, callback in _ROUTES])
     logger.info("All handlers added to the application.")
 
+    # 4. Define the app lifespan (setup_fastapi_webhook runs the Application lifecycle inside it)
+    @contextlib.asynccontextmanager
+    async def lifespan(app: FastAPI):
+        """Runs startup work once per worker and cleans it up on shutdown."""
+        global SAMPLE_FILES_AVAILABLE
+        # Create the downloads dir and check for sample files once, off the request path
+        DOWNLOADS_DIR.mkdir(parents=True, exist_ok=True)
+        SAMPLE_FILES_AVAILABLE = SAMPLE_FILES_DIR.is_dir()
+        if not SAMPLE_FILES_AVAILABLE:
+            logger.warning(f"Sample files directory not found: {SAMPLE_FILES_DIR}. /upload will be skipped.")
+        # Open the connection to graph.facebook.com before the first command arrives
+        await bot.prewarm()
+        # Upload sample files in the background so the server starts serving right away
+        uploads_task = asyncio.create_task(upload_sample_files(bot))
+        try:
+            yield
+        finally:
+            uploads_task.cancel()
+            await asyncio.gather(uploads_task, return_exceptions=True)
+            # Let read receipts the handlers fired off finish before the client closes
+            await _drain_background_tasks(timeout=2.0)
+            # Last step: setup_fastapi_webhook has already drained the in-flight
+            # handlers (and shut down the Application) before this lifespan exits
+            await http_client.aclose()
+
     # 5. Create FastAPI App
     fastapi_app = FastAPI(
         title="wa_cloud Test Bot",
         description="A comprehensive test bot for the wa_cloud library.",
-        version="0.1.0" # Correlate with library version if desired
+        version="0.1.0", # Correlate with library version if desired
+        lifespan=lifespan
     )
     logger.info("FastAPI application instance created.")
 
@@ -714,35 +981,31 @@ def main() -> FastAPI: # Add return type hint
     setup_fastapi_webhook(
         app=fastapi_app,
         application=application,
-        webhook_path=WEBHOOK_PATH,
-        verify_token=VERIFY_TOKEN,
+        webhook_path=SETTINGS.webhook_path,
+        verify_token=SETTINGS.verify_token,
         run_background_tasks=True # Recommended for production
     )
 
-    # 7. Add custom startup tasks (like uploading files)
-    # @fastapi_app.on_event("startup")
-    # async def custom_startup():
-    #      # Schedule the startup tasks to run after FastAPI starts
-    #      for task_func in startup_tasks:
-    #          asyncio.create_task(task_func())
-
     logger.info("--- Bot Setup Complete ---")
     return fastapi_app
 
 # --- Uvicorn Entry Point ---
-# Create the FastAPI app instance by calling main() when the script is loaded
-app = main()
+# Create the FastAPI app instance by calling main() when uvicorn imports the module.
+# When run as a script, this process only supervises uvicorn (which imports
+# "full_test_bot:app" itself), so skip building an app that would never serve.
+app = main() if __name__ != "__main__" else None
 
 # Allow running directly using `python examples/full_test_bot.py`
 if __name__ == "__main__":
      import uvicorn
      logger.info("Starting Uvicorn development server...")
-     port = int(os.getenv("PORT", 5000))
      # Bind to 0.0.0.0 to be accessible from network/Docker if needed
      # Use reload=True for development to automatically pick up code changes
      uvicorn.run(
          "full_test_bot:app", # Point uvicorn to the app object in this script
          host="0.0.0.0",
-         port=port,
+         port=SETTINGS.port,
+         loop="uvloop" if sys.platform != "win32" else "asyncio", # uvloop is POSIX-only
+         http="httptools",
          reload=True
      )
\ No newline at end of file
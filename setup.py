@@ -43,6 +43,12 @@ setup(
             "fastapi >= 0.100.0",
             "uvicorn[standard] >= 0.20.0",
         ],
+        "http2": [
+            "httpx[http2] >= 0.24.0",
+        ],
+        "speedups": [
+            "orjson >= 3.9.0",
+        ],
         "dev": [
             # "pytest",
             # "pytest-asyncio",
@@ -57,11 +57,17 @@ from .constants import (
 )
 
 # --- Optional Webhook Utilities ---
-# Attempt to import framework-specific helpers; will be None if dependencies aren't met.
-try:
-    from .webhooks import setup_fastapi_webhook
-except ImportError:
-    setup_fastapi_webhook = None
+# Framework-specific helpers are imported on first access (PEP 562), so
+# `import wa_cloud` doesn't pull in FastAPI. It will be None if dependencies aren't met.
+def __getattr__(name):
+    if name == "setup_fastapi_webhook":
+        try:
+            from .webhooks import setup_fastapi_webhook as helper
+        except ImportError:
+            helper = None
+        globals()[name] = helper # Cache so later lookups skip __getattr__
+        return helper
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # --- Public API Definition (`__all__`) ---
 # Defines symbols exported when using 'from wa_cloud import *'
@@ -6,7 +6,7 @@ and dispatching them to appropriate handlers.
 """
 import asyncio
 import logging
-from typing import List, Optional, Type, Any, Set # Added Set for task tracking
+from typing import List, Optional, Type, Any, Set, Tuple # Added Set for task tracking
 
 from pydantic import ValidationError
 
@@ -28,18 +28,35 @@ class Application:
     Attributes:
         bot (Bot): The Bot instance used for API interactions.
         handlers (List[BaseHandler]): The list of registered handlers.
+        concurrency_limit (Optional[int]): Maximum number of handler callbacks
+            running at once, or None for no limit.
     """
-    def __init__(self, bot: Bot):
+    def __init__(self, bot: Bot, concurrency_limit: Optional[int] = None):
         """
         Initializes the Application.
 
         Args:
             bot: An initialized Bot instance.
+            concurrency_limit: Optional. Caps how many handler callbacks may run
+                               concurrently (across all webhook payloads), e.g. to stay
+                               within WhatsApp's messaging rate limits. Handlers beyond
+                               the cap wait for a free slot. None (default) means no cap.
+
+        Raises:
+            TypeError: If `bot` is not a Bot instance.
+            ValueError: If `concurrency_limit` is less than 1.
         """
         if not isinstance(bot, Bot):
              raise TypeError("Application requires a valid wa_cloud.Bot instance.")
+        if concurrency_limit is not None and concurrency_limit < 1:
+            raise ValueError("concurrency_limit must be a positive integer or None.")
         self.bot = bot
+        self.concurrency_limit = concurrency_limit
+        # Created lazily inside the running event loop (see _execute_handler)
+        self._semaphore: Optional[asyncio.Semaphore] = None
         self.handlers: List[BaseHandler] = []
+        # Immutable snapshot of `handlers` iterated on every dispatch; rebuilt by add_handler
+        self._handler_snapshot: Tuple[BaseHandler, ...] = ()
         self._running = False # State flag, potentially useful for future features
         # Use a set for efficient addition/removal of tasks
         self._tasks: Set[asyncio.Task] = set()
@@ -48,7 +65,9 @@ class Application:
         """
         Registers a handler to process updates.
 
-        Handlers are checked in the order they are added.
+        Handlers are checked in the order they are added. Always register
+        handlers through this method (or `add_handlers`) rather than mutating
+        `handlers` directly, so the dispatch snapshot stays in sync.
 
         Args:
             handler: An instance of a class derived from BaseHandler.
@@ -59,6 +78,7 @@ class Application:
         if not isinstance(handler, BaseHandler):
             raise TypeError("Handler must be an instance of a BaseHandler subclass.")
         self.handlers.append(handler)
+        self._handler_snapshot = tuple(self.handlers)
         logger.info(f"Handler added: {type(handler).__name__}")
 
     def add_handlers(self, handlers: List[BaseHandler]):
@@ -71,7 +91,7 @@ class Application:
         for handler in handlers:
             self.add_handler(handler) # Reuse single add_handler for validation
 
-    async def process_webhook_payload(self, payload: dict):
+    async def process_webhook_payload(self, payload: dict, wait_for_handlers: bool = False):
         """
         Processes a raw webhook payload received from WhatsApp.
 
@@ -80,11 +100,17 @@ class Application:
 
         Args:
             payload: The raw dictionary payload received from the webhook POST request.
+            wait_for_handlers: If False (default), matching handlers are scheduled as
+                               independent tasks and this method returns right after
+                               dispatch. If True, handlers run inline and this method
+                               returns only once they have all finished, so the caller
+                               (e.g. a fixed pool of webhook workers) bounds how many
+                               handlers run at once.
         """
         try:
             # 1. Validate the payload against the Pydantic model
             webhook_data = WebhookPayload.model_validate(payload)
-            logger.debug(f"Webhook payload validated for object: {webhook_data.object}")
+            logger.debug("Webhook payload validated for object: %s", webhook_data.object)
 
             # 2. Extract processable updates (currently focusing on messages)
             updates_to_process: List[Any] = []
@@ -97,51 +123,58 @@ class Application:
                                 for msg in change.value.messages:
                                     # Future enhancement: Could enrich message objects here if needed
                                     updates_to_process.append(msg)
-                                    logger.info(f"Message update found: {msg.id} (Type: {msg.type})")
+                                    logger.info("Message update found: %s (Type: %s)", msg.id, msg.type)
                             # TODO: Implement handling for other change fields like 'statuses'
                             elif change.field == "statuses" and change.value and change.value.statuses:
-                                 logger.debug(f"Received status updates: {change.value.statuses}")
+                                 logger.debug("Received status updates: %s", change.value.statuses)
                                  # for status in change.value.statuses:
                                  #    status_update = StatusUpdate.model_validate(status) # Assuming a StatusUpdate model
                                  #    updates_to_process.append(status_update)
                             # Handle other fields if necessary
                             else:
-                                logger.debug(f"Ignoring unhandled change field: {change.field}")
+                                logger.debug("Ignoring unhandled change field: %s", change.field)
 
 
             # 3. Dispatch extracted updates to handlers
             if updates_to_process:
-                 logger.debug(f"Dispatching {len(updates_to_process)} update(s) to handlers.")
+                 logger.debug("Dispatching %s update(s) to handlers.", len(updates_to_process))
                  # Process updates sequentially for predictable handler execution order
                  # within a single webhook payload. Parallel processing across different
                  # payloads happens naturally due to async nature.
                  for update in updates_to_process:
-                      await self._dispatch_update(update)
+                      await self._dispatch_update(update, inline=wait_for_handlers)
             else:
                 logger.debug("No processable updates found in the webhook payload.")
 
         except ValidationError as e:
             # Log validation errors clearly, showing the problematic payload parts if possible
-            logger.error(f"Webhook payload validation failed: {e}")
+            logger.error("Webhook payload validation failed: %s", e)
         except Exception as e:
             # Catch-all for unexpected errors during processing
-            logger.exception(f"Unexpected error processing webhook payload: {e}")
+            logger.exception("Unexpected error processing webhook payload: %s", e)
 
 
-    async def _dispatch_update(self, update: Any):
+    async def _dispatch_update(self, update: Any, inline: bool = False):
          """
          Finds appropriate handlers for a given update and schedules their execution.
 
          Args:
              update: The extracted update object (e.g., a Message instance).
+             inline: If True, await each matching handler in the current task
+                     instead of scheduling it as a separate task.
          """
-         logger.debug(f"Dispatching update of type {type(update).__name__}")
+         logger.debug("Dispatching update of type %s", type(update).__name__)
          found_handler = False
-         for handler in self.handlers:
+         for handler in self._handler_snapshot:
              # Check if the handler is appropriate for this update
              if handler.check_update(update):
                  found_handler = True
-                 logger.debug(f"Matching handler found for update: {type(handler).__name__}")
+                 logger.debug("Matching handler found for update: %s", type(handler).__name__)
+
+                 if inline:
+                     # The caller's task runs the handler; _execute_handler logs its errors
+                     await self._execute_handler(handler, update)
+                     continue
 
                  # Schedule handler execution as an independent asyncio task
                  # This allows the webhook endpoint to return quickly
@@ -164,7 +197,7 @@ class Application:
                  # break
 
          if not found_handler:
-             logger.debug(f"No matching handler found for update of type {type(update).__name__}")
+             logger.debug("No matching handler found for update of type %s", type(update).__name__)
 
 
     async def _execute_handler(self, handler: BaseHandler, update: Any):
@@ -177,12 +210,19 @@ class Application:
         """
         handler_name = type(handler).__name__
         try:
-            logger.debug(f"Executing handler: {handler_name}")
-            await handler.handle_update(update, self.bot)
-            logger.debug(f"Handler execution finished: {handler_name}")
+            if self.concurrency_limit is None:
+                logger.debug("Executing handler: %s", handler_name)
+                await handler.handle_update(update, self.bot)
+            else:
+                if self._semaphore is None:
+                    self._semaphore = asyncio.Semaphore(self.concurrency_limit)
+                async with self._semaphore:
+                    logger.debug("Executing handler: %s", handler_name)
+                    await handler.handle_update(update, self.bot)
+            logger.debug("Handler execution finished: %s", handler_name)
         except Exception as e:
             # Log exceptions occurring within the handler's callback
-            logger.exception(f"Exception occurred in handler {handler_name}: {e}")
+            logger.exception("Exception occurred in handler %s: %s", handler_name, e)
             # Future: Implement custom error handling logic if needed (e.g., notify admin)
 
 
@@ -194,15 +234,15 @@ class Application:
             # Calling result() will re-raise any exception that occurred within the task
             task.result()
         except asyncio.CancelledError:
-             logger.info(f"Handler task {task.get_name()} was cancelled.") # Expected during shutdown
+             logger.info("Handler task %s was cancelled.", task.get_name()) # Expected during shutdown
         except Exception as e:
             # Log exceptions that weren't caught inside _execute_handler (should be rare)
             # or exceptions raised by task.result() itself.
-            logger.exception(f"Exception bubbled up from handler task {task.get_name()}: {e}")
+            logger.exception("Exception bubbled up from handler task %s: %s", task.get_name(), e)
         finally:
             # Remove the completed/cancelled task from the tracking set
             self._tasks.discard(task)
-            logger.debug(f"Removed task {task.get_name()} from tracking set. Remaining tasks: {len(self._tasks)}")
+            logger.debug("Removed task %s from tracking set. Remaining tasks: %s", task.get_name(), len(self._tasks))
 
 
     # --- Application Lifecycle Methods ---
@@ -229,8 +269,8 @@ class Application:
         """
         Performs graceful shutdown tasks for the application.
 
-        Waits for currently running handler tasks to complete (with a timeout)
-        and cancels any remaining tasks.
+        Waits for currently running handler tasks to complete (with a timeout),
+        cancels any remaining tasks, and closes the Bot's HTTP client.
         """
         logger.info("Shutting down Application...")
         self._running = False
@@ -259,4 +299,6 @@ class Application:
         else:
             logger.info("No pending handler tasks to wait for.")
 
+        # Release the Bot's pooled HTTP connections
+        await self.bot.close()
         logger.info("Application shutdown complete.")
\ No newline at end of file
@@ -6,6 +6,8 @@ for interacting with the WhatsApp Cloud API.
 """
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
 import mimetypes
 from pathlib import Path
@@ -19,7 +21,7 @@ from pydantic import HttpUrl # For type hinting and validation
 from . import constants
 from .error import (APIError, AuthenticationError, BadRequestError,
                     NetworkError, RateLimitError, ServerError, WhatsAppError)
-from .http_client import make_request # Use the centralized request function
+from .http_client import create_async_client, json_loads, make_request # Use the centralized request functions
 from .models import ( # Import necessary models for payloads and responses
     ContactSend, DeleteMediaResponse, ErrorData,
     InteractiveActionButton, InteractiveButton,
@@ -34,6 +36,7 @@ from .models import ( # Import necessary models for payloads and responses
 
 logger = logging.getLogger(__name__)
 
+
 class Bot:
     """
     The main class representing the connection to the WhatsApp Cloud API.
@@ -47,6 +50,20 @@ class Bot:
         phone_number_id (str): The WhatsApp Business Account Phone Number ID.
         base_url (str): The base URL for the WhatsApp Graph API.
         default_timeout (float): Default timeout for HTTP requests in seconds.
+
+    API calls share one pooled `httpx.AsyncClient`, created on first use, so
+    keep-alive connections are reused instead of paying a TCP and TLS
+    handshake per request. The client must be released with `close()`:
+    `Application.shutdown` does this, and when using the Bot directly either
+    call it yourself or use the Bot as an async context manager::
+
+        async with Bot(token, phone_number_id) as bot:
+            await bot.send_text(to, "Hello")
+
+    Pooled connections belong to the event loop they were opened on, so if the
+    Bot is used from a new loop (e.g. a second `asyncio.run()`), a fresh client
+    is created for it. A client passed as `http_client` is used as-is and left
+    open; its owner manages its lifecycle.
     """
 
     def __init__(
@@ -55,6 +72,11 @@ class Bot:
         phone_number_id: str,
         api_base_url: str = constants.DEFAULT_API_BASE_URL,
         default_timeout: float = 15.0,
+        http2: bool = False,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 60.0,
+        http_client: Optional[httpx.AsyncClient] = None,
     ):
         """
         Initializes the Bot instance.
@@ -64,6 +86,14 @@ class Bot:
             phone_number_id: The Phone Number ID associated with the WhatsApp Business Account.
             api_base_url: The base URL for the WhatsApp Graph API. Defaults to the value in `wa_cloud.constants`.
             default_timeout: Default timeout in seconds for API requests.
+            http2: Use HTTP/2 for API requests so concurrent calls multiplex over a
+                   few connections. Requires `httpx[http2]`; falls back to HTTP/1.1.
+            max_connections: Maximum number of concurrent connections in the pool.
+            max_keepalive_connections: Maximum number of idle connections kept open.
+            keepalive_expiry: Seconds an idle pooled connection is kept open.
+            http_client: Optional pre-configured `httpx.AsyncClient` to share with
+                         other code. When given, the pool settings above are ignored
+                         and `close()` leaves this client open.
 
         Raises:
             ValueError: If token or phone_number_id is empty.
@@ -80,8 +110,77 @@ class Bot:
         self.default_timeout = default_timeout
         # Pre-compose the authorization header for reuse
         self._headers = {"Authorization": f"Bearer {self.token}"}
+        # Settings for the shared HTTP client, which is created lazily on first use
+        self._client_options = {
+            "http2": http2,
+            "max_connections": max_connections,
+            "max_keepalive_connections": max_keepalive_connections,
+            "keepalive_expiry": keepalive_expiry,
+            "timeout": default_timeout,
+        }
+        self._client: Optional[httpx.AsyncClient] = http_client
+        # Event loop the owned client was created on (see _get_client)
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        # An injected client belongs to the caller, so close() must not close it
+        self._owns_client = http_client is None
         logger.debug(f"Bot initialized for Phone Number ID: {self.phone_number_id}")
 
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        Returns the shared HTTP client, creating it on first use.
+
+        An owned client is also recreated when it was closed or when it was created
+        on a different event loop, whose pooled connections can't be reused.
+
+        Internal helper method.
+        """
+        if not self._owns_client:
+            return self._client
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            # A client from a previous (closed) loop can't be closed from here; drop it
+            self._client = create_async_client(**self._client_options)
+            self._client_loop = loop
+        return self._client
+
+    async def prewarm(self, timeout: float = 2.0) -> None:
+        """
+        Opens a pooled connection to the API host ahead of the first real request.
+
+        Sends a lightweight HEAD request so the TCP and TLS handshake happens at
+        startup instead of delaying the first message. Errors are logged and ignored.
+
+        Args:
+            timeout: Timeout in seconds for the warm-up request.
+        """
+        try:
+            await self._get_client().head(self.base_url, timeout=timeout)
+            logger.debug(f"HTTP connection to {self.base_url} pre-warmed.")
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not pre-warm HTTP connection to {self.base_url}: {e}")
+
+    async def close(self) -> None:
+        """
+        Closes the shared HTTP client and its pooled connections.
+
+        Does nothing for a client injected via `http_client`; its owner closes it.
+        """
+        if not self._owns_client:
+            return
+        # Connections opened on another (finished) loop can't be closed from this one
+        if (self._client is not None and not self._client.is_closed
+                and self._client_loop is asyncio.get_running_loop()):
+            await self._client.aclose()
+            logger.debug("Bot HTTP client closed.")
+        self._client = None
+        self._client_loop = None
+
+    async def __aenter__(self) -> "Bot":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
     def _resolve_url(self, template: str, **kwargs) -> str:
         """
         Constructs the full API endpoint URL from a template and arguments.
@@ -141,7 +240,7 @@ class Bot:
         """
         url = self._resolve_url(endpoint_template, **(endpoint_args or {}))
         request_timeout = timeout if timeout is not None else self.default_timeout
-        logger.debug(f"Making API request: {method} {url}")
+        logger.debug("Making API request: %s %s", method, url)
 
         try:
             # Delegate the actual HTTP request to the http_client module
@@ -152,17 +251,18 @@ class Bot:
                 params=params,
                 json_data=json_data,
                 files=files,
-                timeout=request_timeout
+                timeout=request_timeout,
+                client=self._get_client()
             )
             # make_request raises HTTPStatusError for 4xx/5xx responses
-            return response.json() # Assume successful responses are JSON
+            return json_loads(response.content) # Assume successful responses are JSON
 
         except httpx.HTTPStatusError as e:
             # Try to parse the detailed error from WhatsApp's JSON response
             response_data = None
             error_message = f"API Error {e.response.status_code}: {e.response.text[:500]}" # Default, truncated
             try:
-                response_data = e.response.json()
+                response_data = json_loads(e.response.content)
                 if isinstance(response_data, dict) and "error" in response_data:
                     # Use the ErrorData model for structured error info
                     api_error_detail = ErrorData.model_validate(response_data["error"])
@@ -279,7 +379,7 @@ class Bot:
         """
         message_type = payload.get('type', 'unknown')
         recipient = payload.get('to', 'unknown')
-        logger.info(f"Sending message to: {recipient} - Type: {message_type}")
+        logger.info("Sending message to: %s - Type: %s", recipient, message_type)
 
         # Set default 'messaging_product' if not present
         payload.setdefault("messaging_product", "whatsapp")
@@ -848,6 +948,10 @@ class Bot:
         The returned media ID is temporary (usually valid for 30 days)
         and can be used in `send_image`, `send_video`, etc.
 
+        The file is read into memory in a worker thread (so disk I/O doesn't block
+        the event loop) and sent from there, so peak memory use is about the file
+        size. WhatsApp media limits keep that bounded (e.g. 100MB for documents).
+
         Args:
             file_path: Path object or string path to the local file to upload.
             mime_type: Optional. The MIME type of the file (e.g., "image/jpeg", "video/mp4").
@@ -867,7 +971,10 @@ class Bot:
             WhatsAppError: For other errors during file handling or request processing.
         """
         path = Path(file_path)
-        if not path.is_file():
+        loop = asyncio.get_running_loop()
+        # Check existence first (off the event loop), so a missing file is always
+        # reported as FileNotFoundError, even when its MIME type can't be guessed
+        if not await loop.run_in_executor(None, path.is_file):
             raise FileNotFoundError(f"Media file not found at specified path: {path}")
 
         # Determine MIME type if not explicitly provided
@@ -883,27 +990,27 @@ class Bot:
         upload_timeout = timeout if timeout is not None else self.default_timeout * 4 # e.g., 60 seconds
 
         try:
-            # Use context manager for opening the file
-            with path.open("rb") as file_handle:
-                # Prepare data for multipart/form-data request
-                multipart_data = {
-                    "messaging_product": (None, "whatsapp"),
-                    "type": (None, mime_type), # Providing type is recommended by API docs
-                    "file": (path.name, file_handle, mime_type), # (filename, file_obj, content_type)
-                }
-                # Make the API request using the internal helper
-                response_data = await self._make_api_request(
-                    method="POST",
-                    endpoint_template=constants.MEDIA_ENDPOINT_TEMPLATE,
-                    files=multipart_data,
-                    timeout=upload_timeout
-                )
+            # Read the file in a worker thread so the event loop isn't blocked on disk I/O
+            file_bytes = await loop.run_in_executor(None, path.read_bytes)
+            # Prepare data for multipart/form-data request
+            multipart_data = {
+                "messaging_product": (None, "whatsapp"),
+                "type": (None, mime_type), # Providing type is recommended by API docs
+                "file": (path.name, file_bytes, mime_type), # (filename, content, content_type)
+            }
+            # Make the API request using the internal helper
+            response_data = await self._make_api_request(
+                method="POST",
+                endpoint_template=constants.MEDIA_ENDPOINT_TEMPLATE,
+                files=multipart_data,
+                timeout=upload_timeout
+            )
             # Validate and return the response
             media_id = response_data.get('id', '[missing]')
             logger.info(f"Media uploaded successfully: {path.name} -> Media ID: {media_id}")
             return UploadMediaResponse.model_validate(response_data)
 
-        except FileNotFoundError: # Should be caught by initial check, but good practice
+        except FileNotFoundError:
              logger.error(f"File not found during upload process: {path}")
              raise
         except Exception as e: # Catch potential OS errors reading the file
@@ -978,8 +1085,9 @@ class Bot:
         # Ensure the target directory exists before attempting download
         output_dir = output_file_path.parent
         logger.info(f"Ensuring download directory exists: {output_dir}")
+        loop = asyncio.get_running_loop()
         try:
-             output_dir.mkdir(parents=True, exist_ok=True)
+             await loop.run_in_executor(None, functools.partial(output_dir.mkdir, parents=True, exist_ok=True))
         except OSError as e:
             logger.exception(f"Failed to create directory for media download: {output_dir}")
             raise WhatsAppError(f"Could not create directory '{output_dir}' to save media: {e}") from e
@@ -993,17 +1101,22 @@ class Bot:
             # Include Authorization header as API seems to require it for these URLs
             download_headers = {"Authorization": f"Bearer {self.token}"}
 
-            async with httpx.AsyncClient(timeout=download_timeout, follow_redirects=True) as client:
-                # Use streaming download to handle potentially large files efficiently
-                async with client.stream("GET", media_url_str, headers=download_headers) as response:
-                    # Raise an exception for bad status codes (4xx or 5xx)
-                    response.raise_for_status()
-                    # Open the destination file and write chunks as they arrive
-                    with open(output_file_path, "wb") as f:
-                        bytes_downloaded = 0
-                        async for chunk in response.aiter_bytes():
-                            f.write(chunk)
-                            bytes_downloaded += len(chunk)
+            # Stream through the shared pooled client to handle potentially large files efficiently
+            async with self._get_client().stream(
+                "GET", media_url_str, headers=download_headers,
+                timeout=download_timeout, follow_redirects=True
+            ) as response:
+                # Raise an exception for bad status codes (4xx or 5xx)
+                response.raise_for_status()
+                # Write chunks as they arrive; file I/O runs in worker threads off the event loop
+                f = await loop.run_in_executor(None, open, output_file_path, "wb")
+                try:
+                    bytes_downloaded = 0
+                    async for chunk in response.aiter_bytes(constants.DOWNLOAD_CHUNK_SIZE):
+                        await loop.run_in_executor(None, f.write, chunk)
+                        bytes_downloaded += len(chunk)
+                finally:
+                    await loop.run_in_executor(None, f.close)
             logger.info(f"Media downloaded successfully ({bytes_downloaded} bytes) to: {output_file_path}")
             return output_file_path
 
@@ -1081,7 +1194,7 @@ class Bot:
             payload["typing_indicator"] = {"type": "text"}
 
         # This logger call now always has a value for 'action'
-        logger.info(f"{action}: {message_id}")
+        logger.info("%s: %s", action, message_id)
 
         try:
             response_data = await self._post(
@@ -1090,7 +1203,7 @@ class Bot:
             )
             result = SuccessResponse.model_validate(response_data)
             # Use 'action' variable in debug log for consistency
-            logger.debug(f"API result for '{action}' on {message_id}: {result.success}")
+            logger.debug("API result for '%s' on %s: %s", action, message_id, result.success)
             return result.success
         except Exception as e:
             # Use 'action' variable in error log for consistency
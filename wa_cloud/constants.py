@@ -19,6 +19,9 @@ MEDIA_ENDPOINT_TEMPLATE = "/{phone_number_id}/media"
 MESSAGES_ENDPOINT_TEMPLATE = "/{phone_number_id}/messages"
 MEDIA_DETAIL_ENDPOINT_TEMPLATE = "/{media_id}" # Used for GET (info/URL) and DELETE
 
+# Size in bytes of the chunks streamed to disk when downloading media.
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
 
 # --- Enumerations ---
 
@@ -49,6 +49,9 @@ class MessageHandler(BaseHandler[Message]):
         if not isinstance(filters, BaseFilter):
             raise TypeError("MessageHandler 'filters' argument must be an instance of BaseFilter (e.g., created using wa_cloud.ext.filters).")
         self.filters = filters
+        # Resolved once here instead of on every dispatch
+        self._is_async = asyncio.iscoroutinefunction(callback)
+        self._callback_name = getattr(callback, '__name__', repr(callback))
         logger.debug(f"MessageHandler initialized with filters: {type(filters).__name__}")
 
     def check_update(self, update: Any) -> bool:
@@ -71,11 +74,11 @@ class MessageHandler(BaseHandler[Message]):
         # The filter's __call__ method handles its specific logic.
         try:
             match = self.filters(update)
-            logger.debug(f"Checking message {update.id} against filter {type(self.filters).__name__}: {'Match' if match else 'No match'}")
+            logger.debug("Checking message %s against filter %s: %s", update.id, type(self.filters).__name__, 'Match' if match else 'No match')
             return match
         except Exception as e:
              # Log unexpected errors during filter execution, treat as non-match
-             logger.exception(f"Error executing filter {type(self.filters).__name__} on message {update.id}: {e}")
+             logger.exception("Error executing filter %s on message %s: %s", type(self.filters).__name__, update.id, e)
              return False
 
 
@@ -97,13 +100,12 @@ class MessageHandler(BaseHandler[Message]):
             Any exception raised by the user's callback function will be caught
             and logged by the Application's task handler (`_handle_task_result`).
         """
-        filter_type_name = type(self.filters).__name__
-        callback_name = getattr(self.callback, '__name__', repr(self.callback))
-        logger.debug(f"Executing MessageHandler callback '{callback_name}' for filter '{filter_type_name}' on message {update.id}")
+        callback_name = self._callback_name
+        logger.debug("Executing MessageHandler callback '%s' for filter '%s' on message %s", callback_name, type(self.filters).__name__, update.id)
 
         try:
             # Check if the user provided an async callback
-            if asyncio.iscoroutinefunction(self.callback):
+            if self._is_async:
                 # If async, await its execution
                 return await self.callback(update, bot)
             else:
@@ -112,11 +114,11 @@ class MessageHandler(BaseHandler[Message]):
                 # Users should use async callbacks or manage blocking operations appropriately
                 # (e.g., using asyncio.to_thread in Python 3.9+ or executor pools).
                 # The library currently doesn't manage threading for sync callbacks automatically.
-                logger.debug(f"Running synchronous callback '{callback_name}'. Consider using async for I/O operations.")
+                logger.debug("Running synchronous callback '%s'. Consider using async for I/O operations.", callback_name)
                 return self.callback(update, bot)
         except Exception as e:
              # Although the Application's task handler logs exceptions, logging here
              # provides immediate context within the handler execution.
-             logger.exception(f"Exception raised during execution of callback '{callback_name}': {e}")
+             logger.exception("Exception raised during execution of callback '%s': %s", callback_name, e)
              # Re-raise the exception so the Application's task handler sees it
              raise
\ No newline at end of file
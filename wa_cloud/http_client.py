@@ -5,7 +5,8 @@ Internal asynchronous HTTP client utility.
 
 This module provides a centralized function (`make_request`) for sending
 HTTP requests, primarily intended for use by the `wa_cloud.Bot` class to interact
-with the WhatsApp Cloud API. It leverages the `httpx` library.
+with the WhatsApp Cloud API, and `create_async_client` for building the
+pooled client that the Bot reuses across requests. It leverages the `httpx` library.
 """
 
 import httpx # Async HTTP client library
@@ -16,6 +17,18 @@ from http.client import responses as http_responses # For status code descriptio
 
 logger = logging.getLogger(__name__)
 
+# Prefer orjson (optional, C-implemented) for JSON encoding/decoding on hot paths.
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps # Returns bytes
+except ImportError:
+    json_loads = json.loads
+
+    def json_dumps(obj: Any) -> bytes:
+        """Serializes `obj` to compact UTF-8 JSON bytes (stdlib fallback)."""
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
 # Default timeout for HTTP requests in seconds. Can be overridden per-request.
 DEFAULT_TIMEOUT = 15.0
 
@@ -26,13 +39,16 @@ async def make_request(
     params: Optional[Dict[str, Any]] = None,
     json_data: Optional[Dict[str, Any]] = None,
     files: Optional[Dict[str, Any]] = None, # For multipart/form-data uploads
-    timeout: Optional[float] = None # Allow overriding default timeout
+    timeout: Optional[float] = None, # Allow overriding default timeout
+    client: Optional[httpx.AsyncClient] = None # Persistent client for connection reuse
 ) -> httpx.Response:
     """
     Sends an asynchronous HTTP request using httpx and handles basic exceptions.
 
-    This function creates a new httpx.AsyncClient for each request to ensure
-    isolation, though connection pooling might be less efficient for high volumes.
+    If a persistent `client` is given, the request is sent through it so its
+    connection pool (keep-alive, HTTP/2) is reused across calls. Otherwise a new
+    httpx.AsyncClient is created for this request only, which pays the TCP and
+    TLS handshake every time.
     It raises httpx exceptions on network errors or bad status codes, which
     are expected to be caught and translated by the calling code (e.g., Bot class).
 
@@ -45,6 +61,8 @@ async def make_request(
         files: Optional dictionary for multipart/form-data file uploads.
                Format: {'file': ('filename.jpg', file_object, 'image/jpeg')}
         timeout: Optional request timeout in seconds. Uses DEFAULT_TIMEOUT if None.
+        client: Optional persistent httpx.AsyncClient to send the request with.
+                The caller owns it; it is not closed here.
 
     Returns:
         The httpx.Response object on success.
@@ -55,60 +73,120 @@ async def make_request(
         httpx.RequestError: For other network-level errors (DNS, connection, etc.).
     """
     request_timeout = timeout if timeout is not None else DEFAULT_TIMEOUT
+
+    if client is not None:
+        return await _send_request(client, method, url, headers, params, json_data, files, request_timeout)
+
+    # No shared client: use an isolated client for this request only.
+    async with httpx.AsyncClient(timeout=request_timeout) as isolated_client:
+        return await _send_request(isolated_client, method, url, headers, params, json_data, files, request_timeout)
+
+
+async def _send_request(
+    client: httpx.AsyncClient,
+    method: str,
+    url: Union[str, httpx.URL],
+    headers: Optional[Dict[str, str]],
+    params: Optional[Dict[str, Any]],
+    json_data: Optional[Dict[str, Any]],
+    files: Optional[Dict[str, Any]],
+    request_timeout: float
+) -> httpx.Response:
+    """Sends a single request with `client`, logging and re-raising httpx errors."""
     url_str = str(url) # Ensure URL is string for logging
+    try:
+        # Log the request initiation at DEBUG level
+        logger.debug(
+            "Sending API Request: %s %s | Params: %s | JSON: %s | Files: %s",
+            method, url_str, params is not None, json_data is not None, files is not None
+        )
+
+        # Encode JSON bodies ourselves so orjson is used when available
+        content = None
+        if json_data is not None:
+            content = json_dumps(json_data)
+            headers = {**(headers or {}), "Content-Type": "application/json"}
+
+        response = await client.request(
+            method=method,
+            url=url, # httpx handles both str and URL objects
+            headers=headers,
+            params=params,
+            content=content,
+            files=files,   # httpx handles multipart encoding
+            timeout=request_timeout,
+        )
+
+        # Log the response status at DEBUG level
+        if logger.isEnabledFor(logging.DEBUG):
+            status_description = http_responses.get(response.status_code, "Unknown Status")
+            logger.debug("Received API Response: %s %s from %s", response.status_code, status_description, response.url)
+
+        # Check if the response status code indicates an error (4xx or 5xx).
+        # This will raise an httpx.HTTPStatusError if it's an error status.
+        response.raise_for_status()
+
+        # Return the successful response object
+        return response
+
+    except httpx.TimeoutException as e:
+        # Log timeout errors specifically
+        logger.error(f"API request timed out after {request_timeout}s: {method} {url_str}")
+        raise # Re-raise for the caller (Bot class) to handle
+
+    except httpx.HTTPStatusError as e:
+        # Log HTTP status errors, including response text snippet for context
+        response_text_snippet = e.response.text[:200] # Log only the beginning
+        logger.error(
+            f"API request failed with status {e.response.status_code} {http_responses.get(e.response.status_code, '')}: "
+            f"{method} {e.request.url} "
+            f"| Response: '{response_text_snippet}{'...' if len(e.response.text) > 200 else ''}'"
+        )
+        raise # Re-raise for the caller (Bot class) to translate
+
+    except httpx.RequestError as e:
+        # Log other network-level errors (connection, DNS, etc.)
+        logger.error(f"Network error during API request: {method} {e.request.url} - {e}")
+        raise # Re-raise for the caller (Bot class) to handle
+    except Exception as e:
+         # Catch any other unexpected exceptions during the request process
+         logger.exception(f"Unexpected error in make_request for {method} {url_str}")
+         raise # Re-raise the original unexpected error
+
+
+def create_async_client(
+    http2: bool = False,
+    max_connections: int = 100,
+    max_keepalive_connections: int = 20,
+    keepalive_expiry: float = 60.0,
+    timeout: float = DEFAULT_TIMEOUT
+) -> httpx.AsyncClient:
+    """
+    Creates a pooled httpx.AsyncClient suitable for sharing across many requests.
+
+    HTTP/2 requires the optional `h2` package (`pip install httpx[http2]`).
+    If it is not installed, the client falls back to HTTP/1.1 with a warning.
+
+    Args:
+        http2: Enable HTTP/2 so concurrent requests multiplex over few connections.
+        max_connections: Maximum number of concurrent connections in the pool.
+        max_keepalive_connections: Maximum number of idle connections kept open.
+        keepalive_expiry: Seconds an idle connection is kept before closing.
+        timeout: Default timeout in seconds for requests sent with this client.
 
-    # Use an isolated client per request for simplicity.
-    # For very high throughput, consider managing a persistent client instance.
-    async with httpx.AsyncClient(timeout=request_timeout) as client:
+    Returns:
+        A new httpx.AsyncClient. The caller is responsible for closing it.
+    """
+    if http2:
         try:
-            # Log the request initiation at DEBUG level
-            logger.debug(
-                f"Sending API Request: {method} {url_str} "
-                f"| Params: {params is not None} "
-                f"| JSON: {json_data is not None} "
-                f"| Files: {files is not None}"
-            )
-
-            response = await client.request(
-                method=method,
-                url=url, # httpx handles both str and URL objects
-                headers=headers,
-                params=params,
-                json=json_data, # httpx handles JSON encoding
-                files=files,   # httpx handles multipart encoding
-            )
-
-            # Log the response status at DEBUG level
-            status_description = http_responses.get(response.status_code, "Unknown Status")
-            logger.debug(f"Received API Response: {response.status_code} {status_description} from {response.url}")
-
-            # Check if the response status code indicates an error (4xx or 5xx).
-            # This will raise an httpx.HTTPStatusError if it's an error status.
-            response.raise_for_status()
-
-            # Return the successful response object
-            return response
-
-        except httpx.TimeoutException as e:
-            # Log timeout errors specifically
-            logger.error(f"API request timed out after {request_timeout}s: {method} {url_str}")
-            raise # Re-raise for the caller (Bot class) to handle
-
-        except httpx.HTTPStatusError as e:
-            # Log HTTP status errors, including response text snippet for context
-            response_text_snippet = e.response.text[:200] # Log only the beginning
-            logger.error(
-                f"API request failed with status {e.response.status_code} {http_responses.get(e.response.status_code, '')}: "
-                f"{method} {e.request.url} "
-                f"| Response: '{response_text_snippet}{'...' if len(e.response.text) > 200 else ''}'"
-            )
-            raise # Re-raise for the caller (Bot class) to translate
-
-        except httpx.RequestError as e:
-            # Log other network-level errors (connection, DNS, etc.)
-            logger.error(f"Network error during API request: {method} {e.request.url} - {e}")
-            raise # Re-raise for the caller (Bot class) to handle
-        except Exception as e:
-             # Catch any other unexpected exceptions during the request process
-             logger.exception(f"Unexpected error in make_request for {method} {url_str}")
-             raise # Re-raise the original unexpected error
\ No newline at end of file
+            import h2 # noqa: F401 # Only checking availability
+        except ImportError:
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed (`pip install httpx[http2]`). Using HTTP/1.1.")
+            http2 = False
+
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+    return httpx.AsyncClient(http2=http2, limits=limits, timeout=timeout)
@@ -7,8 +7,10 @@ Provides utilities to easily integrate the wa_cloud Application
 with web frameworks for receiving WhatsApp webhook events.
 """
 
+import asyncio
+import contextlib
 import logging
-from typing import Optional
+from typing import List, Optional
 
 # Attempt to import FastAPI components. These are optional dependencies.
 try:
@@ -27,6 +29,7 @@ except ImportError:
 
 # Use relative import for Application class
 from .application import Application
+from .http_client import json_loads
 
 logger = logging.getLogger(__name__)
 
@@ -35,7 +38,9 @@ def setup_fastapi_webhook(
     application: Application,
     webhook_path: str,
     verify_token: str,
-    run_background_tasks: bool = True
+    run_background_tasks: bool = True,
+    num_workers: int = 0,
+    queue_size: int = 1024
 ):
     """
     Configures GET and POST endpoints on a FastAPI application for WhatsApp webhooks.
@@ -45,8 +50,12 @@ def setup_fastapi_webhook(
     2. POST `webhook_path`: Receives event notifications (like messages) from WhatsApp,
        parses the payload, and passes it to the `application` for processing.
 
-    It also registers FastAPI startup and shutdown event handlers to manage the
-    lifecycle of the provided `wa_cloud.Application` instance.
+    It also wraps the app's lifespan to manage the lifecycle of the provided
+    `wa_cloud.Application` instance: the Application (and any webhook workers) is
+    started after, and shut down before, whatever lifespan the app already has.
+    Resources set up by the app's own lifespan, such as an HTTP client shared with
+    the Bot, therefore stay usable while in-flight handlers drain. This works both
+    with `FastAPI(lifespan=...)` and with `@app.on_event` handlers.
 
     Args:
         app: The `fastapi.FastAPI` application instance.
@@ -61,6 +70,17 @@ def setup_fastapi_webhook(
                               return `200 OK` to WhatsApp immediately, which is
                               recommended. If False, processing happens synchronously
                               within the request handler.
+        num_workers: If greater than 0, payloads are put on a bounded `asyncio.Queue`
+                     and processed by this many long-lived worker tasks instead of
+                     one background task per request. Each worker runs the matching
+                     handlers itself and waits for them to finish, so at most this
+                     many payloads have handlers running at once and no task is
+                     created per message. Takes precedence over `run_background_tasks`.
+                     Defaults to 0 (disabled).
+        queue_size: Maximum number of payloads waiting in the worker queue. When the
+                    queue is full, the POST endpoint waits for a free slot before
+                    acknowledging, applying back-pressure to the sender. Only used
+                    when `num_workers` > 0.
 
     Raises:
         ImportError: If `fastapi` is not installed when this function is called.
@@ -81,8 +101,26 @@ def setup_fastapi_webhook(
     if not webhook_path.startswith("/"):
         webhook_path = "/" + webhook_path
 
+    if num_workers < 0:
+        raise ValueError("`num_workers` cannot be negative.")
+
     logger.info(f"Setting up FastAPI webhook endpoints on path: {webhook_path}")
 
+    # Bounded queue and worker tasks, created on startup when num_workers > 0
+    payload_queue: Optional[asyncio.Queue] = None
+    worker_tasks: List[asyncio.Task] = []
+
+    async def webhook_worker(queue: asyncio.Queue):
+        """Takes payloads from the queue and runs their handlers one payload at a time."""
+        while True:
+            payload = await queue.get()
+            try:
+                # Run handlers inline so the worker stays busy until they finish;
+                # process_webhook_payload logs its own errors
+                await application.process_webhook_payload(payload, wait_for_handlers=True)
+            finally:
+                queue.task_done()
+
     # --- Webhook Verification Endpoint (GET) ---
     @app.get(webhook_path, summary="Verify WhatsApp Webhook", tags=["WhatsApp Webhook"])
     async def verify_webhook_endpoint(request: Request): # type: ignore
@@ -125,16 +163,25 @@ def setup_fastapi_webhook(
         Parses the JSON payload and dispatches it for processing via the Application instance.
         """
         try:
-            # Get raw body for logging snippet, then parse JSON
+            # Get raw body for logging snippet, then parse JSON (orjson if installed)
             payload_bytes = await request.body()
-            payload_json = await request.json()
+            payload_json = json_loads(payload_bytes)
 
             # Log a snippet of the raw payload for debugging (avoid logging sensitive data if possible)
-            log_snippet = payload_bytes[:500].decode('utf-8', errors='replace')
-            logger.info(f"Webhook POST received ({len(payload_bytes)} bytes): {log_snippet}{'...' if len(payload_bytes) > 500 else ''}")
+            if logger.isEnabledFor(logging.INFO):
+                log_snippet = payload_bytes[:500].decode('utf-8', errors='replace')
+                logger.info(
+                    "Webhook POST received (%d bytes): %s%s",
+                    len(payload_bytes), log_snippet, '...' if len(payload_bytes) > 500 else ''
+                )
 
             # Process the payload using the Application instance
-            if run_background_tasks:
+            if payload_queue is not None:
+                 # Hand off to the worker pool; waits only if the queue is full
+                 await payload_queue.put(payload_json)
+                 logger.debug("Webhook payload queued for worker processing.")
+                 return Response(content="EVENT_RECEIVED", status_code=200, media_type="text/plain")
+            elif run_background_tasks:
                  # Add processing to background tasks to return 200 OK quickly
                  background_tasks.add_task(application.process_webhook_payload, payload_json)
                  logger.debug("Webhook payload processing added to background tasks.")
@@ -156,19 +203,54 @@ def setup_fastapi_webhook(
             raise HTTPException(status_code=500, detail="Internal server error processing webhook event.")
 
     # --- Application Lifecycle Integration ---
-    # Use FastAPI's event handlers to initialize and shut down the wa_cloud Application
-    @app.on_event("startup")
+    # Compose with the app's existing lifespan instead of using on_event, because
+    # Starlette ignores on_event handlers once an app defines its own lifespan.
     async def fastapi_startup_event():
         """Initializes the wa_cloud Application when FastAPI starts."""
-        logger.info("FastAPI startup event: Initializing wa_cloud Application...")
+        nonlocal payload_queue
+        logger.info("FastAPI startup: Initializing wa_cloud Application...")
         await application.initialize()
         logger.info("wa_cloud Application initialized.")
+        if num_workers > 0:
+            payload_queue = asyncio.Queue(maxsize=queue_size)
+            for _ in range(num_workers):
+                worker_tasks.append(asyncio.create_task(webhook_worker(payload_queue)))
+            logger.info(f"Started {num_workers} webhook worker(s) (queue size: {queue_size}).")
 
-    @app.on_event("shutdown")
     async def fastapi_shutdown_event():
         """Shuts down the wa_cloud Application gracefully when FastAPI stops."""
-        logger.info("FastAPI shutdown event: Shutting down wa_cloud Application...")
+        nonlocal payload_queue
+        logger.info("FastAPI shutdown: Shutting down wa_cloud Application...")
+        if payload_queue is not None:
+            queue, payload_queue = payload_queue, None # New requests fall back to other modes
+            try:
+                # Give queued payloads a chance to be processed before stopping workers
+                await asyncio.wait_for(queue.join(), timeout=10.0)
+            except asyncio.TimeoutError:
+                logger.warning(f"{queue.qsize()} queued webhook payload(s) were not processed before shutdown.")
+            for task in worker_tasks:
+                task.cancel()
+            await asyncio.gather(*worker_tasks, return_exceptions=True)
+            worker_tasks.clear()
+            logger.info("Webhook workers stopped.")
         await application.shutdown()
         logger.info("wa_cloud Application shutdown complete.")
 
-    logger.info("FastAPI webhook endpoint setup and lifecycle events registered.")
\ No newline at end of file
+    # The app's current lifespan: a user-supplied one, or Starlette's default
+    # that runs any @app.on_event("startup"/"shutdown") handlers.
+    inner_lifespan = app.router.lifespan_context
+
+    @contextlib.asynccontextmanager
+    async def webhook_lifespan(lifespan_app):
+        # Enter the app's lifespan first and leave it last, so handlers draining
+        # during shutdown can still use whatever it set up
+        async with inner_lifespan(lifespan_app) as state:
+            await fastapi_startup_event()
+            try:
+                yield state
+            finally:
+                await fastapi_shutdown_event()
+
+    app.router.lifespan_context = webhook_lifespan
+
+    logger.info("FastAPI webhook endpoint setup and lifespan registered.")
\ No newline at end of file